@@ -6,6 +6,10 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List, Optional
 
+# The project directory (parent of config.py) never changes at runtime
+_PROJECT_DIR = Path(__file__).parent
+_DEFAULT_PATHS = (_PROJECT_DIR / "input", _PROJECT_DIR / "output")
+
 
 @dataclass
 class Config:
@@ -19,6 +23,7 @@ class Config:
     parallel_workers: int = 4
     batch_size: int = 100
     timestamp_threshold_seconds: int = 10
+    timestamp_cache: Optional[Path] = None  # MP4 timestamp cache file, None = off
     
     # File patterns
     exclude_patterns: List[str] = field(default_factory=lambda: ["thumbnail~"])
@@ -36,6 +41,10 @@ class Config:
     # Media processing
     overlay_quality: int = 95
     max_dimension: int = 4096
+    hw_encoder: Optional[str] = None  # ffmpeg video encoder override, None = auto
+    overlay_backend: str = "ffmpeg"  # "ffmpeg" (CLI) or "pyav" (in-process, CLI fallback)
+    copy_mode: str = "copy"  # "copy", "reflink" or "hardlink" for staging media
+    conversation_format: str = "json"  # "json" or "jsonl" conversation storage
     
     # Validation
     max_file_size_mb: int = 500
@@ -44,26 +53,31 @@ class Config:
     @classmethod
     def get_default_paths(cls) -> tuple[Path, Path]:
         """Get default input and output paths relative to the project."""
-        # Get the snapchat-new directory (parent of config.py)
-        project_dir = Path(__file__).parent
-        return project_dir / "input", project_dir / "output"
+        return _DEFAULT_PATHS
     
     @classmethod
     def from_args(cls, args) -> "Config":
         """Create config from command-line arguments."""
+        default_data_dir, default_output_dir = _DEFAULT_PATHS
+        
         # Use args.input if available (from --input flag)
         data_dir = getattr(args, 'input', None)
         if data_dir is None:
-            data_dir, _ = cls.get_default_paths()
+            data_dir = default_data_dir
         
         # Use args.output if available
         output_dir = getattr(args, 'output', None)
         if output_dir is None:
-            _, output_dir = cls.get_default_paths()
+            output_dir = default_output_dir
         
         return cls(
             data_dir=data_dir,
             output_dir=output_dir,
             parallel_workers=getattr(args, 'workers', 4),
-            timestamp_threshold_seconds=getattr(args, 'timestamp_threshold', 10)
+            timestamp_threshold_seconds=getattr(args, 'timestamp_threshold', 10),
+            timestamp_cache=getattr(args, 'timestamp_cache', None),
+            hw_encoder=getattr(args, 'hw_encoder', None),
+            overlay_backend=getattr(args, 'overlay_backend', "ffmpeg"),
+            copy_mode=getattr(args, 'copy_mode', "copy"),
+            conversation_format=getattr(args, 'conversation_format', "json")
         )
\ No newline at end of file
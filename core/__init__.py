@@ -1,17 +1,25 @@
 """Core functionality for Snapchat Merger V2"""
 
 from .metadata_extractor import (
+    FriendRecord,
     load_friends_data,
+    build_friend_indexes,
+    load_friend_indexes,
     determine_account_owner,
     extract_conversation_participants,
     create_participant_object,
-    create_conversation_metadata
+    create_conversation_metadata,
+    get_index_timestamp
 )
 
 __all__ = [
+    'FriendRecord',
     'load_friends_data',
+    'build_friend_indexes',
+    'load_friend_indexes',
     'determine_account_owner', 
     'extract_conversation_participants',
     'create_participant_object',
-    'create_conversation_metadata'
+    'create_conversation_metadata',
+    'get_index_timestamp'
 ]
\ No newline at end of file
@@ -7,58 +7,170 @@ and build comprehensive conversation metadata objects.
 Adapted from: snapchat_merger/metadata_extractor.py
 """
 
-from datetime import datetime
-from typing import Dict, List, Any, Optional, Set
+from dataclasses import dataclass
+from functools import lru_cache
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Set, Tuple, Union
 import logging
 
+from utils.json_handler import iter_json_items
+
 logger = logging.getLogger(__name__)
 
 
-def load_friends_data(friends_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+# Friend list sections and the status recorded for users found in each
+FRIEND_SECTIONS = (
+    ('Friends', 'active'),
+    ('Deleted Friends', 'deleted')
+)
+
+
+@dataclass(frozen=True)
+class FriendRecord:
+    """friends_map entry for a single user.
+    
+    Declares __slots__ by hand (rather than dataclass(slots=True)) to stay
+    usable on Python < 3.10; a slotted instance is far smaller than the
+    equivalent six-key dict.
+    """
+    __slots__ = (
+        'display_name',
+        'creation_timestamp',
+        'last_modified_timestamp',
+        'source',
+        'friend_status',
+        'friend_list_section'
+    )
+    
+    display_name: str
+    creation_timestamp: str
+    last_modified_timestamp: str
+    source: str
+    friend_status: str
+    friend_list_section: str
+
+
+def _build_friend_entry(friend: Dict[str, Any], status: str, section: str) -> FriendRecord:
+    """Build the friends_map entry for a single friends.json record."""
+    return FriendRecord(
+        display_name=friend.get('Display Name', friend.get('Name', friend['Username'])),
+        creation_timestamp=friend.get('Creation Timestamp', 'N/A'),
+        last_modified_timestamp=friend.get('Last Modified Timestamp', 'N/A'),
+        source=friend.get('Source', 'unknown'),
+        friend_status=status,
+        friend_list_section=section
+    )
+
+
+def _read_friend_sections(friends_path: Path) -> Dict[str, Any]:
+    """
+    Read only the friend list sections of friends.json, in one pass.
+    
+    Files of STREAM_MIN_BYTES or more are streamed by iter_json_items, so
+    the other sections are parsed and dropped one at a time instead of
+    being held together. A real friends.json is far below that size and is
+    loaded in full, which is faster; the streaming path only matters for
+    unusually large files.
+    """
+    wanted = {section for section, _ in FRIEND_SECTIONS}
+    return {key: value for key, value in iter_json_items(friends_path) if key in wanted}
+
+
+def load_friends_data(friends_data: Union[Dict[str, Any], Path]) -> Dict[str, FriendRecord]:
     """
     Load and organize friends data from all sections.
     
     Adapted from: snapchat_merger/metadata_extractor.py:13-54
     
     Args:
-        friends_data: Raw friends data loaded from friends.json
+        friends_data: Raw friends data loaded from friends.json, or the path
+                      to friends.json to read the friend lists from
         
     Returns:
-        Mapping of username to friend data with status information
+        Mapping of username to FriendRecord with status information
     """
-    friends_map = {}
+    if isinstance(friends_data, Path):
+        friends_data = _read_friend_sections(friends_data)
     
-    # Process active friends
-    for friend in friends_data.get('Friends', []):
-        username = friend.get('Username')
-        if username:
-            friends_map[username] = {
-                'display_name': friend.get('Display Name', friend.get('Name', username)),
-                'creation_timestamp': friend.get('Creation Timestamp', 'N/A'),
-                'last_modified_timestamp': friend.get('Last Modified Timestamp', 'N/A'),
-                'source': friend.get('Source', 'unknown'),
-                'friend_status': 'active',
-                'friend_list_section': 'Friends'
-            }
-    
-    # Process deleted friends
-    for friend in friends_data.get('Deleted Friends', []):
-        username = friend.get('Username')
-        if username:
-            friends_map[username] = {
-                'display_name': friend.get('Display Name', friend.get('Name', username)),
-                'creation_timestamp': friend.get('Creation Timestamp', 'N/A'),
-                'last_modified_timestamp': friend.get('Last Modified Timestamp', 'N/A'),
-                'source': friend.get('Source', 'unknown'),
-                'friend_status': 'deleted',
-                'friend_list_section': 'Deleted Friends'
-            }
+    friends_map = {}
+    for section, status in FRIEND_SECTIONS:
+        for friend in friends_data.get(section, []):
+            # Skip records without a username before building the entry
+            if friend.get('Username'):
+                friends_map[friend['Username']] = _build_friend_entry(friend, status, section)
     
     logger.info(f"Loaded friend data for {len(friends_map)} users")
     return friends_map
 
 
-def determine_account_owner(merged_data: Dict[str, List[Dict[str, Any]]]) -> str:
+def build_friend_indexes(
+    friends_data: Dict[str, Any]
+) -> Tuple[Dict[str, str], Dict[str, FriendRecord]]:
+    """
+    Build the display name map and friends_map in a single pass.
+    
+    Equivalent to build_user_display_map (Friends section only) plus
+    load_friends_data (all sections), without walking Friends twice.
+    
+    Args:
+        friends_data: Parsed friends.json data
+        
+    Returns:
+        Tuple of (username to display name, username to FriendRecord)
+    """
+    username_map = {}
+    friends_map = {}
+    for section, status in FRIEND_SECTIONS:
+        friends = friends_data.get(section, [])
+        if not isinstance(friends, list):
+            continue
+        is_friends_section = section == 'Friends'
+        for friend in friends:
+            if not isinstance(friend, dict):
+                continue
+            username = friend.get('Username')
+            if is_friends_section and username is not None and 'Display Name' in friend:
+                username_map[username] = friend['Display Name']
+            if username:
+                friends_map[username] = _build_friend_entry(friend, status, section)
+    
+    logger.info(f"Built display name map for {len(username_map)} users")
+    logger.info(f"Loaded friend data for {len(friends_map)} users")
+    return username_map, friends_map
+
+
+@lru_cache(maxsize=4)
+def _load_friend_indexes_cached(
+    friends_path: Path, mtime_ns: int
+) -> Tuple[Dict[str, str], Dict[str, FriendRecord]]:
+    """Parse friends.json once per (path, modification time)."""
+    return build_friend_indexes(_read_friend_sections(friends_path))
+
+
+def load_friend_indexes(friends_path: Path) -> Tuple[Dict[str, str], Dict[str, FriendRecord]]:
+    """
+    Load friends.json and build both friend indexes, reusing earlier results.
+    
+    Only the friend list sections are kept while reading (see
+    _read_friend_sections). The parsed indexes are cached per path and modification
+    time, so repeated runs in the same process only re-read the file after
+    it changes.
+    
+    Args:
+        friends_path: Path to friends.json
+        
+    Returns:
+        Tuple of (username to display name, username to FriendRecord). The
+        dicts are shared between calls, so callers must not mutate them.
+    """
+    return _load_friend_indexes_cached(friends_path, friends_path.stat().st_mtime_ns)
+
+
+def determine_account_owner(
+    merged_data: Dict[str, List[Dict[str, Any]]],
+    sender_counts: Optional[Dict[str, int]] = None
+) -> str:
     """
     Determine the account owner from message data.
     
@@ -66,18 +178,38 @@ def determine_account_owner(merged_data: Dict[str, List[Dict[str, Any]]]) -> str
     
     Args:
         merged_data: The merged conversation data
+        sender_counts: Counts of IsSender messages per username collected
+                       while merging; when given, the most frequent sender
+                       is used and the messages are not scanned again
         
     Returns:
         Username of the account owner
     """
-    # Find messages where IsSender is True
-    for messages in merged_data.values():
-        if isinstance(messages, list):
-            for msg in messages:
-                if msg.get('IsSender') and msg.get('From'):
-                    owner = msg['From']
-                    logger.info(f"Determined account owner: {owner}")
-                    return owner
+    if sender_counts:
+        owner = max(sender_counts, key=sender_counts.get)
+        logger.info(f"Determined account owner: {owner}")
+        return owner
+    
+    conversations = [msgs for msgs in merged_data.values() if isinstance(msgs, list)]
+    
+    # Most conversations hold a sent message, so checking only the first
+    # message of each usually finds the owner without a full scan
+    owner = next(
+        (msgs[0]['From'] for msgs in conversations
+         if msgs and msgs[0].get('IsSender') and msgs[0].get('From')),
+        None
+    )
+    if owner is None:
+        # Fall back to any message where IsSender is True
+        owner = next(
+            (msg['From'] for msgs in conversations
+             for msg in msgs if msg.get('IsSender') and msg.get('From')),
+            None
+        )
+    
+    if owner is not None:
+        logger.info(f"Determined account owner: {owner}")
+        return owner
     
     logger.warning("Could not determine account owner from messages")
     return 'unknown'
@@ -86,7 +218,8 @@ def determine_account_owner(merged_data: Dict[str, List[Dict[str, Any]]]) -> str
 def extract_conversation_participants(
     conversation_id: str,
     messages: List[Dict[str, Any]],
-    account_owner: str
+    account_owner: str,
+    is_group: Optional[bool] = None
 ) -> Set[str]:
     """
     Extract unique participants from a conversation.
@@ -97,6 +230,8 @@ def extract_conversation_participants(
         conversation_id: The conversation ID (username or UUID)
         messages: List of messages in the conversation
         account_owner: Username of the account owner
+        is_group: Whether this is a group conversation, if already known;
+                  detected from the messages when None
         
     Returns:
         Set of unique participant usernames (excluding account owner)
@@ -104,28 +239,59 @@ def extract_conversation_participants(
     participants = set()
     
     # For individual conversations, the conversation ID is the other participant
-    is_group = any(msg.get('Conversation Title') for msg in messages)
+    if is_group is None:
+        is_group = any(msg.get('Conversation Title') for msg in messages)
     
     if not is_group:
         # Individual conversation - conversation ID is the other participant
         participants.add(conversation_id)
     else:
-        # Group conversation - extract from message senders and recipients
+        # Group conversation - collect every sender and recipient, then drop
+        # the account owner and empty values once instead of per message
+        add = participants.add
         for msg in messages:
-            sender = msg.get('From')
-            recipient = msg.get('To')
-            
-            if sender and sender != account_owner:
-                participants.add(sender)
-            if recipient and recipient != account_owner:
-                participants.add(recipient)
+            add(msg.get('From'))
+            add(msg.get('To'))
+        
+        participants.discard(account_owner)
+        participants.discard(None)
+        participants.discard('')
     
     return participants
 
 
+def _friend_participant(username: str, friend_data: FriendRecord, is_owner: bool) -> Dict[str, Any]:
+    """Participant object for a user found in friends_map."""
+    return {
+        'username': username,
+        'display_name': friend_data.display_name,
+        'creation_timestamp': friend_data.creation_timestamp,
+        'last_modified_timestamp': friend_data.last_modified_timestamp,
+        'source': friend_data.source,
+        'friend_status': friend_data.friend_status,
+        'friend_list_section': friend_data.friend_list_section,
+        'is_owner': is_owner
+    }
+
+
+def _unknown_participant(username: str, is_owner: bool) -> Dict[str, Any]:
+    """Participant object for a user not in any friends list."""
+    return {
+        'username': username,
+        'display_name': username,
+        'creation_timestamp': 'N/A',
+        'last_modified_timestamp': 'N/A',
+        'source': 'not_in_friends_list',
+        'friend_status': 'not_found',
+        'friend_list_section': 'Not Found',
+        'is_owner': is_owner,
+        'note': 'User not found in any friends list'
+    }
+
+
 def create_participant_object(
     username: str,
-    friends_map: Dict[str, Dict[str, Any]],
+    friends_map: Dict[str, FriendRecord],
     account_owner: str
 ) -> Dict[str, Any]:
     """
@@ -135,7 +301,8 @@ def create_participant_object(
     
     Args:
         username: The participant's username
-        friends_map: Mapping of username to friend data
+        friends_map: Mapping of username to FriendRecord, as built by
+                     load_friends_data
         account_owner: Username of the account owner
         
     Returns:
@@ -145,32 +312,17 @@ def create_participant_object(
     is_owner = username == account_owner
     
     # Get friend data if available
-    friend_data = friends_map.get(username, {})
-    
-    if friend_data:
-        return {
-            'username': username,
-            'display_name': friend_data.get('display_name', username),
-            'creation_timestamp': friend_data.get('creation_timestamp', 'N/A'),
-            'last_modified_timestamp': friend_data.get('last_modified_timestamp', 'N/A'),
-            'source': friend_data.get('source', 'unknown'),
-            'friend_status': friend_data.get('friend_status', 'not_found'),
-            'friend_list_section': friend_data.get('friend_list_section', 'Not Found'),
-            'is_owner': is_owner
-        }
-    else:
-        # User not in friends list
-        return {
-            'username': username,
-            'display_name': username,
-            'creation_timestamp': 'N/A',
-            'last_modified_timestamp': 'N/A',
-            'source': 'not_in_friends_list',
-            'friend_status': 'not_found',
-            'friend_list_section': 'Not Found',
-            'is_owner': is_owner,
-            'note': 'User not found in any friends list'
-        }
+    friend_data = friends_map.get(username)
+    
+    if friend_data is not None:
+        return _friend_participant(username, friend_data, is_owner)
+    # User not in friends list
+    return _unknown_participant(username, is_owner)
+
+
+def get_index_timestamp() -> str:
+    """Current UTC time in the ISO format used for 'index_created'."""
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat() + 'Z'
 
 
 def create_conversation_metadata(
@@ -178,7 +330,8 @@ def create_conversation_metadata(
     messages: List[Dict[str, Any]],
     participants: List[Dict[str, Any]],
     is_group: bool,
-    account_owner: str
+    account_owner: str,
+    index_created: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Create comprehensive conversation metadata.
@@ -191,10 +344,16 @@ def create_conversation_metadata(
         participants: List of participant objects
         is_group: Whether this is a group conversation
         account_owner: Username of the account owner
+        index_created: Timestamp of the run from get_index_timestamp(); pass
+                       it in when building many conversations so it is
+                       computed once (defaults to now)
         
     Returns:
         Conversation metadata object
     """
+    if index_created is None:
+        index_created = get_index_timestamp()
+    
     # Calculate date range
     date_range = {
         'first_message': 'N/A',
@@ -212,10 +371,18 @@ def create_conversation_metadata(
         if last_msg.get('Created'):
             date_range['last_message'] = last_msg['Created']
     
-    # Count message types
+    # Count message types and find the group name in a single pass
     message_count = len(messages)
-    snap_count = sum(1 for msg in messages if msg.get('Type') == 'snap')
-    chat_count = sum(1 for msg in messages if msg.get('Type') == 'message')
+    snap_count = chat_count = 0
+    group_name = None
+    for msg in messages:
+        msg_type = msg.get('Type')
+        if msg_type == 'snap':
+            snap_count += 1
+        elif msg_type == 'message':
+            chat_count += 1
+        if is_group and not group_name:
+            group_name = msg.get('Conversation Title')
     
     metadata = {
         'conversation_type': 'group' if is_group else 'individual',
@@ -227,15 +394,11 @@ def create_conversation_metadata(
         'participant_count': len(participants),
         'account_owner': account_owner,
         'date_range': date_range,
-        'index_created': datetime.utcnow().isoformat() + 'Z'
+        'index_created': index_created
     }
     
     # Add group-specific metadata
-    if is_group and messages:
-        # Get conversation title from any message
-        for msg in messages:
-            if msg.get('Conversation Title'):
-                metadata['group_name'] = msg['Conversation Title']
-                break
+    if group_name:
+        metadata['group_name'] = group_name
     
     return metadata
\ No newline at end of file
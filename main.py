@@ -65,6 +65,47 @@ def create_argument_parser() -> argparse.ArgumentParser:
         help="Skip overlay-media pair merging"
     )
     
+    parser.add_argument(
+        "--hw-encoder",
+        type=str,
+        default=None,
+        help="ffmpeg video encoder for overlay merging, e.g. h264_videotoolbox, "
+             "h264_nvenc or h264_qsv (default: auto-detect)"
+    )
+    
+    parser.add_argument(
+        "--overlay-backend",
+        choices=["ffmpeg", "pyav"],
+        default="ffmpeg",
+        help="How overlays are merged: the ffmpeg CLI, or PyAV in-process with "
+             "the CLI as fallback for files PyAV fails on (default: ffmpeg)"
+    )
+    
+    parser.add_argument(
+        "--copy-mode",
+        choices=["copy", "reflink", "hardlink"],
+        default="copy",
+        help="How chat media is staged for processing: full copy, copy-on-write "
+             "clone, or hard link; falls back to copying when unsupported (default: copy)"
+    )
+    
+    parser.add_argument(
+        "--conversation-format",
+        choices=["json", "jsonl"],
+        default="json",
+        help="Conversation storage: a single conversation.json, or metadata.json "
+             "plus messages.jsonl with one message per line (default: json)"
+    )
+    
+    parser.add_argument(
+        "--timestamp-cache",
+        type=Path,
+        default=None,
+        metavar="PATH",
+        help="Keep extracted MP4 timestamps in this file and reuse them on later "
+             "runs while the files are unchanged (default: no cache)"
+    )
+    
     parser.add_argument(
         "--debug",
         action="store_true",
@@ -160,11 +201,8 @@ def main() -> int:
     overall_start_time = time.time()
     
     try:
-        # Import phases here to avoid circular imports
-        from phases.phase0 import run_phase0
-        from phases.phase1 import run_phase1
-        from phases.phase2 import run_phase2
-        from phases.phase3_validation import run_phase3
+        # Phases are imported right before they run (also avoids circular
+        # imports), so startup only pays for what has been reached
         from statistics.reporter_rich import StatisticsReporter
         
         # Initialize statistics reporter
@@ -173,12 +211,17 @@ def main() -> int:
         # Phase 0: Initial Setup
         print("\n📋 Phase 0: Initial Setup")
         print("-" * 40)
+        from phases.phase0 import run_phase0
         phase0_start = time.time()
         phase0_stats = run_phase0(
             data_dir=data_dir,
             output_dir=args.output,
             skip_overlay_merge=args.no_overlay_merge,
-            max_workers=args.workers
+            max_workers=args.workers,
+            video_encoder=args.hw_encoder,
+            copy_mode=args.copy_mode,
+            conversation_format=args.conversation_format,
+            overlay_backend=args.overlay_backend
         )
         phase0_duration = time.time() - phase0_start
         reporter.add_phase_stats(0, phase0_stats)
@@ -188,6 +231,7 @@ def main() -> int:
         # Phase 1: Media Mapping
         print("\n📍 Phase 1: Media Mapping")
         print("-" * 40)
+        from phases.phase1 import run_phase1
         
         # Phase 1 loads from individual conversation files
         conversations_dir = args.output / 'conversations'
@@ -202,7 +246,8 @@ def main() -> int:
             output_dir=args.output,
             timestamp_threshold=args.timestamp_threshold,
             max_workers=args.workers,
-            use_parallel=False  # Can be made configurable
+            use_parallel=False,  # Can be made configurable
+            timestamp_cache=args.timestamp_cache
         )
         phase1_duration = time.time() - phase1_start
         reporter.add_phase_stats(1, phase1_stats)
@@ -212,6 +257,7 @@ def main() -> int:
         # Phase 2: Media Organization
         print("\n🗂️ Phase 2: Media Organization")
         print("-" * 40)
+        from phases.phase2 import run_phase2
         phase2_start = time.time()
         phase2_stats = run_phase2(
             output_dir=args.output,
@@ -225,6 +271,7 @@ def main() -> int:
         # Phase 3: Validation
         print("\n✅ Phase 3: Validation")
         print("-" * 40)
+        from phases.phase3_validation import run_phase3
         phase3_start = time.time()
         phase3_stats = run_phase3(
             data_dir=data_dir,
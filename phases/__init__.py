@@ -1,8 +1,8 @@
 """Phase implementations for Snapchat Merger V2"""
 
 __all__ = [
-    'phase0_initial',
-    'phase1_mapping',
-    'phase2_organization',
+    'phase0',
+    'phase1',
+    'phase2',
     'phase3_validation'
 ]
\ No newline at end of file
@@ -18,13 +18,15 @@ from .user_mapper import build_user_display_map
 # Conversation merging
 from .conversation_merger import (
     add_message_type,
-    merge_conversations
+    merge_conversations,
+    merge_conversation_items
 )
 
 # Conversation splitting
 from .conversation_splitter import (
     is_group_conversation,
     get_latest_timestamp,
+    get_latest_timestamp_dt,
     generate_conversation_folder_name,
     write_conversation_file,
     split_conversations
@@ -50,10 +52,12 @@ __all__ = [
     # Conversation merging
     'add_message_type',
     'merge_conversations',
+    'merge_conversation_items',
     
     # Conversation splitting
     'is_group_conversation',
     'get_latest_timestamp',
+    'get_latest_timestamp_dt',
     'generate_conversation_folder_name',
     'write_conversation_file',
     'split_conversations',
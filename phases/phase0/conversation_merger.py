@@ -3,11 +3,23 @@ Phase 0 Conversation Merger Module.
 Merges chat and snap histories into unified conversations.
 """
 
+import heapq
 import logging
-from typing import Dict, List, Any
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+TIMESTAMP_FIELD = "Created(microseconds)"
+
+# C-level sort key; only usable when every message carries the field
+_timestamp_key = itemgetter(TIMESTAMP_FIELD)
+
+
+def _timestamp_key_default(msg: Dict[str, Any]) -> int:
+    """Sort key for messages that may lack a timestamp (sorted first)."""
+    return msg.get(TIMESTAMP_FIELD, 0)
+
 
 def add_message_type(messages: List[Dict[str, Any]], msg_type: str) -> List[Dict[str, Any]]:
     """
@@ -25,9 +37,94 @@ def add_message_type(messages: List[Dict[str, Any]], msg_type: str) -> List[Dict
     return messages
 
 
+def _tag_and_sort(
+    messages: List[Dict[str, Any]],
+    msg_type: str,
+    sender_counts: Optional[Dict[str, int]] = None
+) -> Tuple[List[Dict[str, Any]], Callable[[Dict[str, Any]], int]]:
+    """
+    Tag messages with their Type and return them sorted by timestamp.
+    
+    Tagging, the timestamp presence check and an order check share one
+    pass; a list that is already in order is returned as is, without
+    sorting. When sender_counts is given, the senders of messages sent by
+    the account (IsSender) are counted in the same pass.
+    
+    Returns:
+        Tuple of (sorted messages, sort key usable for merging them)
+    """
+    has_timestamps = True
+    in_order = True
+    previous = 0
+    for msg in messages:
+        msg["Type"] = msg_type
+        if sender_counts is not None and msg.get("IsSender"):
+            sender = msg.get("From")
+            if sender:
+                sender_counts[sender] = sender_counts.get(sender, 0) + 1
+        timestamp = msg.get(TIMESTAMP_FIELD)
+        if timestamp is None:
+            has_timestamps = False
+            timestamp = 0
+        if timestamp < previous:
+            in_order = False
+        previous = timestamp
+    
+    key = _timestamp_key if has_timestamps else _timestamp_key_default
+    if in_order:
+        return messages, key
+    return sorted(messages, key=key), key
+
+
+def merge_conversation_items(
+    chat_items: Iterable[Tuple[str, List[Dict[str, Any]]]],
+    snap_items: Iterable[Tuple[str, List[Dict[str, Any]]]],
+    sender_counts: Optional[Dict[str, int]] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Merge chat and snap histories given as (conversation ID, messages) pairs.
+    
+    Each pair is tagged, sorted and merged as it arrives, so the histories
+    can be streamed from disk (see utils.json_handler.iter_json_items)
+    without building separate chat and snap dicts first.
+    
+    Args:
+        chat_items: Chat history pairs
+        snap_items: Snap history pairs
+        sender_counts: Optional dict filled with per-username counts of
+                       IsSender messages, for determine_account_owner
+        
+    Returns:
+        Merged conversations
+    """
+    # Tag and sort each history separately
+    merged = {}
+    chat_keys = {}
+    for conv_id, messages in chat_items:
+        merged[conv_id], chat_keys[conv_id] = _tag_and_sort(messages, "message", sender_counts)
+    
+    for conv_id, snaps in snap_items:
+        snaps, snap_key = _tag_and_sort(snaps, "snap", sender_counts)
+        chats = merged.get(conv_id)
+        if chats:
+            # Both sides are sorted, so a linear two-way merge suffices; on
+            # equal timestamps chat messages stay ahead of snaps
+            if snap_key is _timestamp_key and chat_keys[conv_id] is _timestamp_key:
+                key = _timestamp_key
+            else:
+                key = _timestamp_key_default
+            merged[conv_id] = list(heapq.merge(chats, snaps, key=key))
+        else:
+            merged[conv_id] = snaps
+    
+    logger.info(f"Merged {len(merged)} conversations")
+    return merged
+
+
 def merge_conversations(
     chat_data: Dict[str, List],
-    snap_data: Dict[str, List]
+    snap_data: Dict[str, List],
+    sender_counts: Optional[Dict[str, int]] = None
 ) -> Dict[str, List[Dict[str, Any]]]:
     """
     Merge chat and snap histories by conversation ID.
@@ -35,27 +132,10 @@ def merge_conversations(
     Args:
         chat_data: Chat history data
         snap_data: Snap history data
+        sender_counts: Optional dict filled with per-username counts of
+                       IsSender messages, for determine_account_owner
         
     Returns:
         Merged conversations
     """
-    merged = {}
-    
-    # Add chat messages with Type field
-    for conv_id, messages in chat_data.items():
-        if conv_id not in merged:
-            merged[conv_id] = []
-        merged[conv_id].extend(add_message_type(messages, "message"))
-    
-    # Add snap messages with Type field
-    for conv_id, snaps in snap_data.items():
-        if conv_id not in merged:
-            merged[conv_id] = []
-        merged[conv_id].extend(add_message_type(snaps, "snap"))
-    
-    # Sort each conversation by timestamp
-    for conv_id in merged:
-        merged[conv_id].sort(key=lambda x: x.get("Created(microseconds)", 0))
-    
-    logger.info(f"Merged {len(merged)} conversations")
-    return merged
\ No newline at end of file
+    return merge_conversation_items(chat_data.items(), snap_data.items(), sender_counts)
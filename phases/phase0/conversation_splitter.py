@@ -4,25 +4,127 @@ Splits merged conversations into individual and group conversation folders.
 """
 
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Any, Tuple, Optional
+from typing import Dict, List, Any, Tuple, Optional, Set
 from datetime import datetime
 
 from utils.file_operations import ensure_directory
-from utils.json_handler import save_json
+from utils.json_handler import CONVERSATION_FILES, save_conversation
 from core.metadata_extractor import (
-    extract_conversation_participants,
+    FriendRecord,
     create_participant_object,
-    create_conversation_metadata
+    create_conversation_metadata,
+    get_index_timestamp
 )
 
 logger = logging.getLogger(__name__)
 
+# Folder dates are local, like get_latest_timestamp_dt. Local midnight
+# always falls on a quarter hour in UTC (every UTC offset and DST shift in
+# use is a multiple of 15 minutes), so all instants in a quarter-hour
+# bucket share one local date
+MS_PER_QUARTER_HOUR = 900_000
+
+# Characters that are not safe in folder names: separators become "-",
+# the rest are deleted (None)
+_BAD_CHARS = str.maketrans({
+    "/": "-", "\\": "-", ":": "-",
+    "?": None, "*": None, "|": None, "<": None, ">": None, '"': None
+})
+
+
+@lru_cache(maxsize=4096)
+def _day_str(bucket: int) -> str:
+    """Format the local date of a quarter-hour bucket (ms // MS_PER_QUARTER_HOUR) as YYYY-MM-DD."""
+    return datetime.fromtimestamp(bucket * 900).strftime("%Y-%m-%d")
+
+
+# Every n-th message is compared with the first when checking, in debug
+# logging, that a conversation's title is consistent
+_TITLE_SAMPLE_STEP = 100
+
+
+def _conversation_title(messages: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    Return the Conversation Title of a conversation, taken from its first message.
+    
+    Snapchat exports set the title on every message of a group and on none
+    of an individual chat, so the first message decides. With debug
+    logging enabled, a sample of the messages is checked against it.
+    """
+    if not messages:
+        return None
+    title = messages[0].get("Conversation Title")
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        is_group = title is not None
+        for msg in messages[::_TITLE_SAMPLE_STEP]:
+            if (msg.get("Conversation Title") is not None) != is_group:
+                logger.debug(
+                    "Conversation Title set on only some messages (first: %r)", title
+                )
+                break
+    
+    return title
+
+
+# (is_group, latest_ms, title, users) as returned by _summarize
+_Summary = Tuple[bool, int, Optional[str], Set[str]]
+
+
+def _summarize(messages: List[Dict[str, Any]]) -> _Summary:
+    """
+    Collect everything a conversation folder needs in a single pass over messages.
+    
+    Args:
+        messages: List of messages
+        
+    Returns:
+        Tuple of (is_group, latest_ms, title, users) where title is the
+        Conversation Title (None for individual conversations), latest_ms
+        is 0 when no message carries a timestamp and users holds every
+        From/To username seen (empty values removed)
+    """
+    title = _conversation_title(messages)
+    
+    latest_ms = 0
+    users = set()
+    add = users.add
+    for msg in messages:
+        timestamp_ms = msg.get("Created(microseconds)", 0)
+        if timestamp_ms > latest_ms:
+            latest_ms = timestamp_ms
+        add(msg.get("From"))
+        add(msg.get("To"))
+    
+    users.discard(None)
+    users.discard("")
+    return title is not None, latest_ms, title, users
+
+
+def _format_folder_name(conversation_id: str, latest_ms: int, title: Optional[str]) -> str:
+    """Build "YYYY-MM-DD - name" from values gathered by _summarize."""
+    if latest_ms > 0:
+        # Many conversations end close together, so the formatting is cached
+        timestamp_str = _day_str(latest_ms // MS_PER_QUARTER_HOUR)
+    else:
+        timestamp_str = "0000-00-00"
+    
+    # Group conversations are named by their title
+    name = title if title else conversation_id
+    
+    # Clean the name for filesystem compatibility
+    return f"{timestamp_str} - {name.translate(_BAD_CHARS)}"
+
 
 def is_group_conversation(messages: List[Dict[str, Any]]) -> bool:
     """
     Determine if conversation is a group chat.
-    null Conversation Title = individual, non-null = group
+    null Conversation Title = individual, non-null = group; the title is
+    read from the first message (see _conversation_title)
     
     Args:
         messages: List of messages
@@ -30,36 +132,42 @@ def is_group_conversation(messages: List[Dict[str, Any]]) -> bool:
     Returns:
         True if group conversation, False otherwise
     """
-    for msg in messages:
-        if msg.get("Conversation Title") is not None:
-            return True
-    return False
+    return _conversation_title(messages) is not None
 
 
-def get_latest_timestamp(messages: List[Dict[str, Any]]) -> Optional[datetime]:
+def get_latest_timestamp(messages: List[Dict[str, Any]]) -> Optional[int]:
     """
     Get the latest timestamp from a list of messages.
     
+    Despite its name, Snapchat's "Created(microseconds)" field holds Unix
+    time in milliseconds (e.g. 1704164670000), so the value is returned as is.
+    
+    Args:
+        messages: List of messages
+        
+    Returns:
+        Latest timestamp in milliseconds or None
+    """
+    latest_ms = max((msg.get("Created(microseconds)", 0) for msg in messages), default=0)
+    return latest_ms if latest_ms > 0 else None
+
+
+def get_latest_timestamp_dt(messages: List[Dict[str, Any]]) -> Optional[datetime]:
+    """
+    Get the latest timestamp from a list of messages as a local datetime.
+    
     Args:
         messages: List of messages
         
     Returns:
         Latest datetime or None
     """
-    if not messages:
+    latest_ms = get_latest_timestamp(messages)
+    if latest_ms is None:
         return None
     
-    latest_ms = 0
-    for msg in messages:
-        timestamp_ms = msg.get("Created(microseconds)", 0)
-        if timestamp_ms > latest_ms:
-            latest_ms = timestamp_ms
-    
-    if latest_ms > 0:
-        # Convert milliseconds to datetime
-        return datetime.fromtimestamp(latest_ms / 1000)
-    
-    return None
+    # The field holds milliseconds (see get_latest_timestamp)
+    return datetime.fromtimestamp(latest_ms / 1000)
 
 
 def generate_conversation_folder_name(
@@ -81,26 +189,8 @@ def generate_conversation_folder_name(
     Returns:
         Formatted folder name
     """
-    # Get the latest timestamp
-    latest_timestamp = get_latest_timestamp(messages)
-    
-    if latest_timestamp:
-        timestamp_str = latest_timestamp.strftime("%Y-%m-%d")
-    else:
-        timestamp_str = "0000-00-00"
-    
-    # Determine the name to use
-    if is_group and messages and messages[0].get('Conversation Title'):
-        name = messages[0]['Conversation Title']
-    else:
-        name = conversation_id
-    
-    # Clean the name for filesystem compatibility
-    name = name.replace("/", "-").replace("\\", "-").replace(":", "-")
-    name = name.replace("?", "").replace("*", "").replace("|", "")
-    name = name.replace("<", "").replace(">", "").replace('"', "")
-    
-    return f"{timestamp_str} - {name}"
+    _, latest_ms, title, _ = _summarize(messages)
+    return _format_folder_name(conversation_id, latest_ms, title if is_group else None)
 
 
 def write_conversation_file(
@@ -114,7 +204,8 @@ def write_conversation_file(
     
     Args:
         messages: List of messages
-        output_path: Output file path
+        output_path: Output file path; a messages.jsonl path selects the
+                     metadata.json + JSONL layout
         metadata: Conversation metadata
     """
     data = {
@@ -122,76 +213,158 @@ def write_conversation_file(
         'messages': messages
     }
     
-    save_json(data, output_path)
+    save_conversation(output_path, data)
+
+
+def _conversation_dir(
+    conv_id: str,
+    summary: _Summary,
+    conversations_dir: Path,
+    groups_dir: Path
+) -> Path:
+    """Folder a conversation is written to, from its _summarize result."""
+    is_group, latest_ms, title, _ = summary
+    folder_name = _format_folder_name(conv_id, latest_ms, title)
+    return (groups_dir if is_group else conversations_dir) / folder_name
+
+
+def _participant_usernames(conv_id: str, summary: _Summary, account_owner: str) -> Set[str]:
+    """
+    Participants of a conversation, as extract_conversation_participants would find them.
+    
+    That is the other user for individual chats, and every sender and
+    recipient except the account owner for groups.
+    """
+    is_group, _, _, users = summary
+    if is_group:
+        users.discard(account_owner)
+        return users
+    return {conv_id}
+
+
+# (conv_id, messages, is_group, participants) of a conversation to write
+_Pending = Tuple[str, List[Dict[str, Any]], bool, List[Dict[str, Any]]]
+
+
+def _write_one_conversation(
+    conv_id: str,
+    messages: List[Dict[str, Any]],
+    is_group: bool,
+    conv_dir: Path,
+    participants: List[Dict[str, Any]],
+    account_owner: str,
+    index_created: str,
+    conversation_file: str
+) -> None:
+    """
+    Write the folder and conversation.json for a single conversation.
+    
+    conv_dir is the folder from _conversation_dir and participants the
+    participant objects of the conversation.
+    """
+    # Create conversation directory; its parent already exists, so a bare
+    # mkdir is enough (no exists-check stat first)
+    try:
+        os.mkdir(conv_dir)
+    except FileExistsError:
+        pass
+    
+    # Create comprehensive metadata
+    metadata = create_conversation_metadata(
+        conv_id, messages, participants, is_group, account_owner, index_created
+    )
+    
+    # Save conversation JSON
+    output_path = conv_dir / conversation_file
+    write_conversation_file(messages, output_path, metadata)
 
 
 def split_conversations(
     merged_data: Dict[str, List[Dict[str, Any]]],
     output_dir: Path,
     username_map: Dict[str, str],
-    friends_map: Dict[str, Dict[str, Any]],
-    account_owner: str
+    friends_map: Dict[str, FriendRecord],
+    account_owner: str,
+    max_workers: int = 4,
+    conversation_format: str = "json"
 ) -> Tuple[int, int]:
     """
     Split merged data into individual conversation folders with participant metadata.
     
+    Conversations are written from a thread pool; the work is dominated by
+    file creation and writes, which release the GIL.
+    
     Args:
         merged_data: Merged conversation data
         output_dir: Output directory
         username_map: Username to display name mapping
         friends_map: Friends data mapping
         account_owner: Account owner username
+        max_workers: Number of conversations written concurrently
+        conversation_format: "json" for conversation.json, or "jsonl" for
+                             metadata.json plus one message per line
         
     Returns:
         Tuple of (individual_count, group_count)
     """
-    individual_count = 0
-    group_count = 0
-    
     conversations_dir = output_dir / "conversations"
     groups_dir = output_dir / "groups"
     
     ensure_directory(conversations_dir)
     ensure_directory(groups_dir)
     
+    # All conversations in a run share the same index timestamp
+    index_created = get_index_timestamp()
+    
+    # Friends appear in many conversations; account_owner and friends_map are
+    # fixed for the run, so participants can be keyed by username alone
+    participant_cache: Dict[str, Dict[str, Any]] = {}
+    
+    conversation_file = CONVERSATION_FILES[conversation_format]
+    
+    # Group flag, latest timestamp, title and users in one pass per
+    # conversation. Participants are built here, before any worker starts,
+    # so the workers never touch participant_cache. Conversations whose
+    # folder names collide (same title and last day, or IDs equal after
+    # cleanup) share a batch, so they are written one after another in
+    # input order and the last one wins, as in a sequential run, instead
+    # of interleaving their writes.
+    batches: Dict[Path, List[_Pending]] = {}
+    individual_count = 0
+    group_count = 0
     for conv_id, messages in merged_data.items():
         if not messages:
             continue
+        summary = _summarize(messages)
+        is_group = summary[0]
         
-        # Determine if group
-        is_group = is_group_conversation(messages)
-        
-        # Generate folder name
-        folder_name = generate_conversation_folder_name(conv_id, messages, is_group=is_group)
+        participants = []
+        for username in _participant_usernames(conv_id, summary, account_owner):
+            participant = participant_cache.get(username)
+            if participant is None:
+                participant = create_participant_object(username, friends_map, account_owner)
+                participant_cache[username] = participant
+            participants.append(participant)
         
-        # Choose output directory
+        conv_dir = _conversation_dir(conv_id, summary, conversations_dir, groups_dir)
+        batches.setdefault(conv_dir, []).append((conv_id, messages, is_group, participants))
         if is_group:
-            conv_dir = groups_dir / folder_name
             group_count += 1
         else:
-            conv_dir = conversations_dir / folder_name
             individual_count += 1
-        
-        # Create conversation directory
-        ensure_directory(conv_dir)
-        
-        # Extract participants for this conversation
-        participant_usernames = extract_conversation_participants(conv_id, messages, account_owner)
-        
-        # Create participant objects
-        participants = []
-        for username in participant_usernames:
-            participant = create_participant_object(username, friends_map, account_owner)
-            participants.append(participant)
-        
-        # Create comprehensive metadata
-        metadata = create_conversation_metadata(
-            conv_id, messages, participants, is_group, account_owner
-        )
-        
-        # Save conversation JSON
-        output_path = conv_dir / "conversation.json"
-        write_conversation_file(messages, output_path, metadata)
+    
+    def write(item: Tuple[Path, List[_Pending]]) -> None:
+        conv_dir, batch = item
+        for conv_id, messages, is_group, participants in batch:
+            _write_one_conversation(
+                conv_id, messages, is_group, conv_dir, participants,
+                account_owner, index_created, conversation_file
+            )
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Consume the results so errors raised by workers propagate
+        for _ in executor.map(write, batches.items()):
+            pass
     
     logger.info(f"Split into {individual_count} individual and {group_count} group conversations")
-    return individual_count, group_count
\ No newline at end of file
+    return individual_count, group_count
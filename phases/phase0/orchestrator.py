@@ -3,32 +3,93 @@ Phase 0 Orchestrator Module.
 Main entry point that coordinates all Phase 0 operations.
 """
 
+import gc
 import logging
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from .stats import Phase0Stats
 from .temp_setup import create_temp_directory
-from .user_mapper import build_user_display_map
-from .conversation_merger import merge_conversations
+from .conversation_merger import merge_conversation_items
 from .conversation_splitter import split_conversations
 from .overlay_processor import merge_overlay_pairs
 
-from utils.json_handler import load_json, validate_chat_history, validate_snap_history
+from utils.json_handler import (
+    iter_json_items,
+    validate_chat_history,
+    validate_snap_history
+)
 from utils.file_operations import copy_media_files
 from core.metadata_extractor import (
-    load_friends_data,
+    load_friend_indexes,
     determine_account_owner
 )
 
 logger = logging.getLogger(__name__)
 
 
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    """
+    Suspend the cyclic garbage collector for the duration of the block.
+    
+    Loading and merging histories allocates millions of message dicts and
+    lists in a burst. None of them form reference cycles, but each burst
+    would still trigger repeated collections that walk the whole growing
+    heap. Reference counting keeps freeing temporaries as usual.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def _checked_history(
+    items: Iterable[Tuple[str, List[Dict[str, Any]]]],
+    validate: Callable[[Dict[str, Any]], bool],
+    label: str,
+    totals: Dict[str, int]
+) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Pass history pairs through, validating and counting them on the way.
+    
+    validate is called with a one-entry {conv_id: messages} dict for each
+    pair as it streams past, and the first failure is reported once.
+    validate_chat_history and validate_snap_history check every
+    conversation on its own, so this reports a failure exactly when
+    validating the whole history at once would. The check that the
+    history is a JSON object is done by iter_json_items, which raises
+    ValueError otherwise; an empty history yields no pairs and is valid,
+    as before.
+    
+    Validation and counting happen while the pairs are consumed, so
+    totals[label] is only complete once the iterator is exhausted;
+    run_phase0 reads it after merge_conversation_items has consumed both
+    histories.
+    """
+    valid = True
+    totals[label] = 0
+    for conv_id, messages in items:
+        if valid and not validate({conv_id: messages}):
+            logger.warning(f"{label} validation failed")
+            valid = False
+        totals[label] += len(messages)
+        yield conv_id, messages
+
+
 def run_phase0(
     data_dir: Path,
     output_dir: Path,
     skip_overlay_merge: bool = False,
-    max_workers: int = 4
+    max_workers: int = 4,
+    video_encoder: Optional[str] = None,
+    copy_mode: str = "copy",
+    conversation_format: str = "json",
+    overlay_backend: str = "ffmpeg"
 ) -> Phase0Stats:
     """
     Run Phase 0: Initial Setup.
@@ -38,6 +99,10 @@ def run_phase0(
         output_dir: Output directory
         skip_overlay_merge: Whether to skip overlay merging
         max_workers: Number of parallel workers
+        video_encoder: ffmpeg video encoder for overlay merging (None for the default)
+        copy_mode: How media is brought into temp_media ("copy", "reflink" or "hardlink")
+        conversation_format: Conversation storage layout ("json" or "jsonl")
+        overlay_backend: Overlay merging backend ("ffmpeg" or "pyav")
         
     Returns:
         Phase 0 statistics
@@ -52,57 +117,58 @@ def run_phase0(
     # 2. Copy media files (excluding thumbnails)
     media_source = data_dir / "chat_media"
     if media_source.exists():
-        copy_stats = copy_media_files(media_source, temp_dir)
+        copy_stats = copy_media_files(
+            media_source, temp_dir, copy_mode=copy_mode, max_workers=max_workers
+        )
         stats.media_files_copied = copy_stats["copied"]
         stats.files_in_chat_media = copy_stats["total_files"]
     
-    # 3. Load JSON files
+    # 3. Open chat and snap histories; large files are streamed, and each
+    # conversation is validated and counted as it is read
     json_dir = data_dir / "json"
-    
-    # Load chat history
-    chat_path = json_dir / "chat_history.json"
-    chat_data = load_json(chat_path)
-    if not validate_chat_history(chat_data):
-        logger.warning("Chat history validation failed")
-    
-    # Load snap history
-    snap_path = json_dir / "snap_history.json"
-    snap_data = load_json(snap_path)
-    if not validate_snap_history(snap_data):
-        logger.warning("Snap history validation failed")
-    
-    # Count messages and snaps
-    for messages in chat_data.values():
-        stats.total_messages += len(messages)
-    for snaps in snap_data.values():
-        stats.total_snaps += len(snaps)
+    totals: Dict[str, int] = {}
+    chat_items = _checked_history(
+        iter_json_items(json_dir / "chat_history.json"),
+        validate_chat_history, "Chat history", totals
+    )
+    snap_items = _checked_history(
+        iter_json_items(json_dir / "snap_history.json"),
+        validate_snap_history, "Snap history", totals
+    )
     
     # 4. Load friends data for display names and metadata
     friends_path = json_dir / "friends.json"
     username_map = {}
     friends_map = {}
     if friends_path.exists():
-        friends_data = load_json(friends_path)
-        username_map = build_user_display_map(friends_data)
-        friends_map = load_friends_data(friends_data)
+        # Both maps in one pass over the friend lists, cached per file version
+        username_map, friends_map = load_friend_indexes(friends_path)
     
-    # 5. Merge chat and snap histories
-    merged_data = merge_conversations(chat_data, snap_data)
+    # 5. Merge chat and snap histories while reading them, counting sent
+    # messages on the way
+    sender_counts: Dict[str, int] = {}
+    with _gc_paused():
+        merged_data = merge_conversation_items(chat_items, snap_items, sender_counts)
+    stats.total_messages = totals["Chat history"]
+    stats.total_snaps = totals["Snap history"]
     
     # 6. Determine account owner from messages
-    account_owner = determine_account_owner(merged_data)
+    account_owner = determine_account_owner(merged_data, sender_counts)
     logger.info(f"Account owner: {account_owner}")
     
     # 7. Split into conversation folders with participant metadata
     individual_count, group_count = split_conversations(
-        merged_data, output_dir, username_map, friends_map, account_owner
+        merged_data, output_dir, username_map, friends_map, account_owner, max_workers,
+        conversation_format
     )
     stats.individual_conversations = individual_count
     stats.group_conversations = group_count
     
     # 8. Process overlay-media pairs (if not skipped)
     if not skip_overlay_merge:
-        stats.overlay_pairs_merged = merge_overlay_pairs(temp_dir, max_workers)
+        stats.overlay_pairs_merged = merge_overlay_pairs(
+            temp_dir, max_workers, video_encoder, overlay_backend
+        )
     
     logger.info(f"Phase 0 complete: {stats.to_dict()}")
     return stats
\ No newline at end of file
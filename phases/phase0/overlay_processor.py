@@ -4,10 +4,10 @@ Handles detection and merging of overlay-media pairs.
 """
 
 import logging
+import os
 import sys
 from pathlib import Path
-from typing import List, Tuple
-from collections import defaultdict
+from typing import Dict, List, Set, Tuple, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -22,39 +22,60 @@ def detect_overlay_pairs(media_dir: Path) -> List[Tuple[Path, Path]]:
     Returns:
         List of (media_file, overlay_file) tuples
     """
-    files_by_date = defaultdict(lambda: {"media": [], "overlay": []})
+    # One path per date and type; a date seen twice for the same type can
+    # never form a single pair, so it is only recorded as a duplicate
+    media_by_date: Dict[str, str] = {}
+    overlay_by_date: Dict[str, str] = {}
+    dup_dates: Set[str] = set()
     
-    for file_path in media_dir.iterdir():
-        if not file_path.is_file():
-            continue
-        
-        # Extract date from filename
-        parts = file_path.name.split('_', 1)
-        if len(parts) >= 2:
-            date = parts[0]  # YYYY-MM-DD format
+    # scandir serves is_file() from the directory read (no stat per file);
+    # paths are kept as plain strings until a pair is confirmed
+    with os.scandir(media_dir) as entries:
+        for entry in entries:
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            
+            # Split "YYYY-MM-DD_<type>~..." into date and the rest in one scan
+            date, sep, rest = entry.name.partition('_')
+            if not sep:
+                continue
+            
+            if rest.startswith('overlay~'):
+                by_date = overlay_by_date
+            elif rest.startswith('media~'):
+                by_date = media_by_date
+            else:
+                continue
             
-            if '_media~' in file_path.name and '_overlay~' not in file_path.name:
-                files_by_date[date]["media"].append(file_path)
-            elif '_overlay~' in file_path.name:
-                files_by_date[date]["overlay"].append(file_path)
+            if date in by_date:
+                dup_dates.add(date)
+            else:
+                by_date[date] = entry.path
     
     # Find single pairs per date
     pairs = []
-    for date, files in files_by_date.items():
-        if len(files["media"]) == 1 and len(files["overlay"]) == 1:
-            pairs.append((files["media"][0], files["overlay"][0]))
-            logger.debug(f"Found overlay pair for {date}")
+    for date, media_path in media_by_date.items():
+        if date in overlay_by_date and date not in dup_dates:
+            pairs.append((Path(media_path), Path(overlay_by_date[date])))
+            logger.debug("Found overlay pair for %s", date)
     
     return pairs
 
 
-def merge_overlay_pairs(temp_dir: Path, max_workers: int = 4) -> int:
+def merge_overlay_pairs(
+    temp_dir: Path,
+    max_workers: int = 4,
+    video_encoder: Optional[str] = None,
+    overlay_backend: str = "ffmpeg"
+) -> int:
     """
     Merge overlay-media pairs using ffmpeg.
     
     Args:
         temp_dir: Temporary media directory
         max_workers: Number of parallel workers
+        video_encoder: ffmpeg video encoder override (None for the default)
+        overlay_backend: "ffmpeg" (CLI) or "pyav" (in-process, CLI fallback)
         
     Returns:
         Number of pairs successfully merged
@@ -71,7 +92,9 @@ def merge_overlay_pairs(temp_dir: Path, max_workers: int = 4) -> int:
         stats = process_all_overlay_pairs(
             media_dir=temp_dir,
             use_parallel=True,
-            max_workers=max_workers
+            max_workers=max_workers,
+            video_encoder=video_encoder,
+            overlay_backend=overlay_backend
         )
         
         # Log statistics
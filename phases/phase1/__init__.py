@@ -13,7 +13,8 @@ from .stats import Phase1Stats
 from .media_id_extractor import (
     split_pipe_separated_ids,
     extract_media_ids_from_messages,
-    extract_media_id_from_filename
+    extract_media_id_from_filename,
+    extract_media_ids_from_filenames
 )
 
 # File mapping (T1.2)
@@ -23,6 +24,7 @@ from .file_mapper import create_media_index
 from .mp4_processor import (
     parse_mp4_timestamp_binary,
     parse_mp4_timestamp_ffprobe,
+    parse_mp4_timestamps_ffprobe,
     extract_mp4_timestamp
 )
 
@@ -45,6 +47,7 @@ __all__ = [
     'split_pipe_separated_ids',
     'extract_media_ids_from_messages',
     'extract_media_id_from_filename',
+    'extract_media_ids_from_filenames',
     
     # File mapping
     'create_media_index',
@@ -52,6 +55,7 @@ __all__ = [
     # MP4 processing
     'parse_mp4_timestamp_binary',
     'parse_mp4_timestamp_ffprobe',
+    'parse_mp4_timestamps_ffprobe',
     'extract_mp4_timestamp',
     
     # Timestamp matching
@@ -0,0 +1,165 @@
+"""
+Phase 1 MP4 Timestamp Cache.
+Persists extracted MP4 creation timestamps between runs.
+
+The cache is off unless a file is chosen with configure() (the
+--timestamp-cache option). Entries are keyed by absolute path and only
+reused while the file's size and modification time are unchanged; entries
+for files that no longer exist are dropped when the cache is loaded. The
+file is written atomically by save(). It should not be placed in the media
+directory, where later phases would pick it up as an orphaned file.
+"""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cache file, or None while the cache is disabled
+_path: Optional[Path] = None
+
+# path -> (size, mtime_ns, timestamp_ms)
+_entries: Dict[str, Tuple[int, int, int]] = {}
+_loaded = False
+_dirty = False
+_lock = threading.Lock()
+
+
+def configure(path: Optional[Path]) -> None:
+    """
+    Choose the cache file, or disable the cache with None.
+    
+    Entries held for a previously configured file are discarded without
+    being saved; call save() first to keep them.
+    
+    Args:
+        path: Cache file location, or None to disable caching
+    """
+    global _path, _loaded, _dirty
+    with _lock:
+        _path = Path(path) if path is not None else None
+        _entries.clear()
+        _loaded = False
+        _dirty = False
+
+
+def cache_path() -> Optional[Path]:
+    """Location of the cache file, or None if the cache is disabled."""
+    return _path
+
+
+def _load() -> None:
+    """Read the cache file once after configure(); a missing or corrupt file starts empty."""
+    global _loaded, _dirty
+    if _loaded:
+        return
+    _loaded = True
+    
+    try:
+        with open(_path, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+        for key, (size, mtime_ns, timestamp_ms) in raw.items():
+            _entries[key] = (size, mtime_ns, timestamp_ms)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError, TypeError) as e:
+        logger.debug(f"Ignoring unreadable timestamp cache {_path}: {e}")
+        return
+    
+    # Forget files that were deleted since they were cached, so the cache
+    # does not grow with every export that has ever been processed
+    stale = [key for key in _entries if not os.path.exists(key)]
+    for key in stale:
+        del _entries[key]
+    if stale:
+        _dirty = True
+    logger.debug("Loaded %d cached MP4 timestamps from %s (%d stale entries dropped)",
+                 len(_entries), _path, len(stale))
+
+
+def _stat_key(mp4_path: Path) -> Optional[Tuple[str, int, int]]:
+    """(absolute path, size, mtime_ns) of a file, or None if it cannot be stat'ed."""
+    try:
+        st = os.stat(mp4_path)
+    except OSError:
+        return None
+    return os.path.abspath(mp4_path), st.st_size, st.st_mtime_ns
+
+
+def get(mp4_path: Path) -> Optional[int]:
+    """
+    Return the cached timestamp of a file, if the file is unchanged since it was stored.
+    
+    Args:
+        mp4_path: Path to the MP4 file
+    
+    Returns:
+        Timestamp in milliseconds, or None on a cache miss or while the cache
+        is disabled
+    """
+    if _path is None:
+        return None
+    key = _stat_key(mp4_path)
+    if key is None:
+        return None
+    
+    with _lock:
+        _load()
+        entry = _entries.get(key[0])
+    
+    if entry is None or entry[:2] != key[1:]:
+        return None
+    return entry[2]
+
+
+def put(mp4_path: Path, timestamp_ms: int) -> None:
+    """
+    Remember the timestamp extracted from a file.
+    
+    Does nothing while the cache is disabled. New entries are written to
+    disk by save().
+    
+    Args:
+        mp4_path: Path to the MP4 file
+        timestamp_ms: Extracted timestamp in milliseconds
+    """
+    global _dirty
+    if _path is None:
+        return
+    key = _stat_key(mp4_path)
+    if key is None:
+        return
+    
+    with _lock:
+        _load()
+        _entries[key[0]] = (key[1], key[2], timestamp_ms)
+        _dirty = True
+
+
+def save() -> None:
+    """Write the cache file atomically if it changed; errors are logged and ignored."""
+    global _dirty
+    with _lock:
+        if _path is None or not _dirty:
+            return
+        snapshot = {key: list(entry) for key, entry in _entries.items()}
+        _dirty = False
+        path = _path
+    
+    tmp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+        logger.debug("Saved %d MP4 timestamps to %s", len(snapshot), path)
+    except OSError as e:
+        logger.debug(f"Could not save timestamp cache {path}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
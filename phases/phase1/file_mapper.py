@@ -4,67 +4,81 @@ Creates mappings between media IDs and physical files.
 """
 
 import logging
+import os
+import warnings
 from pathlib import Path
-from typing import Dict, Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
+from typing import Dict, List, Optional
 
-from .media_id_extractor import extract_media_id_from_filename
+from .media_id_extractor import extract_media_ids_from_filenames
 
 logger = logging.getLogger(__name__)
 
 
-def create_media_index(media_dir: Path, use_parallel: bool = False, max_workers: int = 4) -> Dict[str, str]:
+def _is_index_entry(entry: os.DirEntry) -> bool:
+    """Whether a media directory entry is indexed: a regular, non-hidden file."""
+    return entry.is_file(follow_symlinks=False) and not entry.name.startswith('.')
+
+
+def create_media_index(
+    media_dir: Path,
+    use_parallel: Optional[bool] = None,
+    max_workers: Optional[int] = None,
+    filenames: Optional[List[str]] = None,
+    filename_ids: Optional[Dict[str, str]] = None
+) -> Dict[str, str]:
     """
     Build a mapping of Media ID to filename.
     Adapted from snapchat_merger/media_mapper.py:68-121
     
     Args:
         media_dir: The directory containing media files
-        use_parallel: Whether to use parallel processing for large directories
-        max_workers: Number of parallel workers (if use_parallel is True)
+        use_parallel: Deprecated and ignored; indexing is always a single
+                      sequential pass. Passing it emits a DeprecationWarning.
+        max_workers: Deprecated and ignored, like use_parallel
+        filenames: Names of the non-hidden regular files in media_dir, if
+                   the caller has already listed it (see _is_index_entry);
+                   the directory is not read again
+        filename_ids: Optional dict filled with filename -> Media ID for
+                      every file that has one, including files whose ID is
+                      shared with another file
         
     Returns:
         A dictionary mapping Media IDs to filenames
     """
-    if not media_dir.exists():
-        logger.warning(f"Media directory does not exist: {media_dir}")
-        return {}
+    if use_parallel is not None or max_workers is not None:
+        warnings.warn(
+            "create_media_index() ignores use_parallel and max_workers; "
+            "they are deprecated and will be removed",
+            DeprecationWarning,
+            stacklevel=2
+        )
     
-    # Get all non-hidden files
-    filenames = [f.name for f in media_dir.iterdir() 
-                 if f.is_file() and not f.name.startswith('.')]
+    if filenames is None:
+        if not media_dir.exists():
+            logger.warning(f"Media directory does not exist: {media_dir}")
+            return {}
+        
+        # Get all non-hidden files; DirEntry caches the file type from the
+        # directory read, so no per-file stat is needed
+        with os.scandir(media_dir) as entries:
+            filenames = [e.name for e in entries if _is_index_entry(e)]
     
     logger.info(f"Found {len(filenames)} files in {media_dir}")
     
-    # Use parallel processing for large directories (>1000 files)
-    if use_parallel and len(filenames) > 1000:
-        media_map = {}
-        lock = threading.Lock()
-        
-        def process_file(filename: str) -> Optional[Tuple[str, str]]:
-            media_id = extract_media_id_from_filename(filename)
-            return (media_id, filename) if media_id else None
-        
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [executor.submit(process_file, f) for f in filenames]
-            
-            for future in as_completed(futures):
-                result = future.result()
-                if result:
-                    media_id, filename = result
-                    with lock:
-                        media_map[media_id] = filename
-        
-        logger.info(f"Mapped {len(media_map)} Media IDs using parallel processing")
-        return media_map
-    else:
-        # Sequential processing for smaller directories
-        media_map = {}
-        for filename in filenames:
-            media_id = extract_media_id_from_filename(filename)
-            if media_id:
-                media_map[media_id] = filename
-        
-        logger.info(f"Mapped {len(media_map)} Media IDs using sequential processing")
-        return media_map
\ No newline at end of file
+    # One sequential pass over all filenames; threads would only contend
+    # for the GIL here, since the work is pure CPU
+    media_ids = extract_media_ids_from_filenames(filenames)
+    media_map = {
+        media_id: filename
+        for filename, media_id in zip(filenames, media_ids)
+        if media_id
+    }
+    if filename_ids is not None:
+        filename_ids.update(
+            (filename, media_id)
+            for filename, media_id in zip(filenames, media_ids)
+            if media_id
+        )
+    
+    logger.info(f"Mapped {len(media_map)} Media IDs")
+    return media_map
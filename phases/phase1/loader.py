@@ -3,51 +3,67 @@ Phase 1 Data Loading Module.
 Handles loading conversation data from JSON files.
 """
 
-import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
+
+from utils.json_handler import find_conversation_file, load_conversation
 
 logger = logging.getLogger(__name__)
 
 
-def load_conversations(conversations_dir: Path, groups_dir: Path) -> Dict[str, List]:
+def _conversation_files(base_dir: Path) -> List[Path]:
+    """List the conversation files of every folder in base_dir."""
+    files = []
+    if base_dir.exists():
+        for folder in base_dir.iterdir():
+            if folder.is_dir():
+                conv_file = find_conversation_file(folder)
+                if conv_file is not None:
+                    files.append(conv_file)
+    return files
+
+
+def _load_one(conv_file: Path) -> Optional[Dict[str, Any]]:
+    """Load a single conversation file, or None if it cannot be read."""
+    try:
+        return load_conversation(conv_file)
+    except Exception as e:
+        logger.error(f"Error loading {conv_file}: {e}")
+        return None
+
+
+def load_conversations(
+    conversations_dir: Path,
+    groups_dir: Path,
+    max_workers: int = 8
+) -> Dict[str, List]:
     """Load all conversation and group data from JSON files.
     
+    Files are parsed through load_conversation, which reads either storage
+    layout and uses orjson when installed.
+    Reads are spread over a thread pool so file I/O overlaps; a file that
+    fails to load is logged and skipped without affecting the others.
+    
     Args:
         conversations_dir: Directory containing individual conversation folders
         groups_dir: Directory containing group conversation folders
+        max_workers: Number of files loaded concurrently
         
     Returns:
         Dictionary with 'conversations' and 'groups' lists
     """
-    data = {
-        'conversations': [],
-        'groups': []
-    }
+    conv_files = _conversation_files(conversations_dir)
+    group_files = _conversation_files(groups_dir)
     
-    # Load individual conversations
-    if conversations_dir.exists():
-        for conv_folder in conversations_dir.iterdir():
-            if conv_folder.is_dir():
-                conv_file = conv_folder / "conversation.json"
-                if conv_file.exists():
-                    try:
-                        with open(conv_file, 'r', encoding='utf-8') as f:
-                            data['conversations'].append(json.load(f))
-                    except Exception as e:
-                        logger.error(f"Error loading {conv_file}: {e}")
+    # map() keeps results in directory order, so they can be split back
+    # into the two buckets by position
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(_load_one, conv_files + group_files))
     
-    # Load group conversations
-    if groups_dir.exists():
-        for group_folder in groups_dir.iterdir():
-            if group_folder.is_dir():
-                group_file = group_folder / "conversation.json"
-                if group_file.exists():
-                    try:
-                        with open(group_file, 'r', encoding='utf-8') as f:
-                            data['groups'].append(json.load(f))
-                    except Exception as e:
-                        logger.error(f"Error loading {group_file}: {e}")
-    
-    return data
\ No newline at end of file
+    split = len(conv_files)
+    return {
+        'conversations': [data for data in results[:split] if data is not None],
+        'groups': [data for data in results[split:] if data is not None]
+    }
@@ -9,6 +9,12 @@ from typing import Dict, List, Tuple, Optional, Set, Any
 
 logger = logging.getLogger(__name__)
 
+# Filename patterns, compiled once since they run for every media file.
+# b~ IDs need no pattern: the ID is everything after "b~" up to the file
+# extension.
+_ZIP_RE = re.compile(r'media~zip-([A-F0-9\-]+)')
+_MO_RE = re.compile(r'(media|overlay)~([A-F0-9\-]+)')
+
 
 def split_pipe_separated_ids(media_ids_str: str) -> List[str]:
     """
@@ -33,10 +39,14 @@ def split_pipe_separated_ids(media_ids_str: str) -> List[str]:
     if not media_ids_str:
         return []
     
+    # Most messages carry a single ID; skip the split for them
+    if ' | ' not in media_ids_str:
+        media_id = media_ids_str.strip()
+        return [media_id] if media_id else []
+    
     # Split by pipe separator WITH SPACES (as per actual data format)
     # The data uses " | " not just "|"
-    ids = [id.strip() for id in media_ids_str.split(' | ') if id.strip()]
-    return ids
+    return [media_id for media_id in map(str.strip, media_ids_str.split(' | ')) if media_id]
 
 
 def extract_media_ids_from_messages(messages: Dict[str, List[Dict[str, Any]]]) -> Tuple[Set[str], Dict[str, Any]]:
@@ -50,29 +60,40 @@ def extract_media_ids_from_messages(messages: Dict[str, List[Dict[str, Any]]]) -
         Tuple of (unique_media_ids set, statistics dict)
     """
     all_media_ids = set()
-    stats = {
-        'total_messages': 0,
-        'messages_with_media': 0,
-        'pipe_separated': 0,  # Changed key name to match what run_phase1 expects
-        'total_ids': 0
-    }
+    total_messages = messages_with_media = pipe_separated = total_ids = 0
+    
+    # Local names for the hot loop; counters stay plain ints until the end
+    split = split_pipe_separated_ids
     
-    for conversation_id, message_list in messages.items():
+    for message_list in messages.values():
+        total_messages += len(message_list)
+        
+        # Collect the conversation's IDs first and add them to the set in
+        # one update call
+        conv_ids = []
+        extend = conv_ids.extend
         for message in message_list:
-            stats['total_messages'] += 1
-            
-            media_ids_field = message.get('Media IDs', '')
+            media_ids_field = message.get('Media IDs')
             if media_ids_field:
-                stats['messages_with_media'] += 1
+                messages_with_media += 1
                 
                 # Parse the IDs
-                ids = split_pipe_separated_ids(media_ids_field)
+                ids = split(media_ids_field)
                 
                 if len(ids) > 1:
-                    stats['pipe_separated'] += 1
+                    pipe_separated += 1
                 
-                stats['total_ids'] += len(ids)
-                all_media_ids.update(ids)
+                extend(ids)
+        
+        total_ids += len(conv_ids)
+        all_media_ids.update(conv_ids)
+    
+    stats = {
+        'total_messages': total_messages,
+        'messages_with_media': messages_with_media,
+        'pipe_separated': pipe_separated,  # Changed key name to match what run_phase1 expects
+        'total_ids': total_ids
+    }
     
     logger.info(f"Extracted {len(all_media_ids)} unique Media IDs from {stats['total_messages']} messages")
     logger.info(f"Found {stats['pipe_separated']} messages with pipe-separated IDs")
@@ -101,27 +122,38 @@ def extract_media_id_from_filename(filename: str) -> Optional[str]:
     if 'thumbnail~' in filename:
         return None
     
-    # Look for b~ pattern in filename
-    if 'b~' in filename:
-        # Split by b~ and get everything after it
-        parts = filename.split('b~', 1)
-        if len(parts) > 1:
-            # Get the ID part before the file extension
-            id_with_ext = parts[1]
-            # Remove the extension
-            id_part = id_with_ext.rsplit('.', 1)[0]
-            return f'b~{id_part}'
+    # Look for b~ pattern in filename (the most common format); plain
+    # string searches, no regex
+    start = filename.find('b~')
+    if start >= 0:
+        rest = filename[start + 2:]
+        dot = rest.rfind('.')
+        return f'b~{rest[:dot] if dot >= 0 else rest}'
     
     # Special handling for media~zip pattern
     if '_media~zip-' in filename:
-        match = re.search(r'media~zip-([A-F0-9\-]+)', filename)
+        match = _ZIP_RE.search(filename)
         if match:
             return f'media~zip-{match.group(1)}'
     
     # Look for media~ or overlay~ pattern
-    match = re.search(r'(?:media|overlay)~([A-F0-9\-]+)', filename)
+    match = _MO_RE.search(filename)
     if match:
-        prefix = 'media' if 'media~' in filename else 'overlay'
-        return f'{prefix}~{match.group(1)}'
+        return f'{match.group(1)}~{match.group(2)}'
     
-    return None
\ No newline at end of file
+    return None
+
+
+def extract_media_ids_from_filenames(filenames: List[str]) -> List[Optional[str]]:
+    """
+    Extract Media IDs from many filenames at once.
+    
+    Equivalent to calling extract_media_id_from_filename on each name.
+    
+    Args:
+        filenames: Media filenames
+        
+    Returns:
+        List of Media IDs (or None) in the same order as filenames
+    """
+    return list(map(extract_media_id_from_filename, filenames))
@@ -3,20 +3,55 @@ Phase 1 T1.3: MP4 Processing Module.
 Handles MP4 timestamp extraction and processing.
 """
 
+import asyncio
+import os
 import struct
 import subprocess
 import json
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
+from . import _ts_cache
+
 logger = logging.getLogger(__name__)
 
 # Constants from original config
 ATOM_HEADER_SIZE = 8
 QUICKTIME_EPOCH_ADJUSTER = 2082844800  # Seconds between 1904 and 1970
 
+# Big-endian field readers, compiled once instead of per struct.unpack call
+_U32 = struct.Struct('>I')
+_U64 = struct.Struct('>Q')
+
+# Bytes read up front when walking atoms. Only the atom headers up to the
+# start of moov are needed (mvhd is its first child), so this covers
+# fast-start files in one read; when moov sits after mdat, the remaining
+# headers are read individually at their offsets.
+HEADER_READ_SIZE = 64 * 1024
+
+# Bytes needed from the start of moov: moov header, mvhd header,
+# version/flags and a 64-bit creation time
+_MOOV_PREFIX_SIZE = ATOM_HEADER_SIZE * 2 + 4 + 8
+
+# ffprobe results keyed by (path, size, mtime_ns), so a file is probed at
+# most once per run unless it changes
+_ffprobe_cache: Dict[Tuple[str, int, int], Optional[int]] = {}
+
+FFPROBE_TIMEOUT = 10
+
+_READ_FLAGS = os.O_RDONLY | getattr(os, 'O_BINARY', 0)
+
+
+def _pread(fd: int, size: int, offset: int) -> bytes:
+    """Read size bytes at offset without moving a shared file position."""
+    if hasattr(os, 'pread'):
+        return os.pread(fd, size, offset)
+    # Windows has no pread
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, size)
+
 
 def parse_mp4_timestamp_binary(mp4_path: Path) -> Optional[int]:
     """
@@ -24,7 +59,8 @@ def parse_mp4_timestamp_binary(mp4_path: Path) -> Optional[int]:
     Adapted from snapchat_merger/audio_timestamp_matcher.py:23-102
     
     This is much faster than using ffprobe subprocess as it only reads
-    the necessary bytes from the file header.
+    the necessary bytes from the file header: one positional read of
+    HEADER_READ_SIZE bytes, plus one small read per atom header beyond it.
     
     Args:
         mp4_path: The path to the MP4 file
@@ -33,52 +69,72 @@ def parse_mp4_timestamp_binary(mp4_path: Path) -> Optional[int]:
         The creation timestamp in milliseconds since Unix epoch, or None if extraction fails
     """
     try:
-        with open(mp4_path, "rb") as f:
+        fd = os.open(mp4_path, _READ_FLAGS)
+        try:
+            buf = _pread(fd, HEADER_READ_SIZE, 0)
+            
+            def view(offset: int, size: int):
+                """(data, position) holding size bytes at offset, from buf when possible."""
+                if offset + size <= len(buf):
+                    return buf, offset
+                return _pread(fd, size, offset), 0
+            
             # Search for moov atom
+            offset = 0
             while True:
-                atom_header = f.read(ATOM_HEADER_SIZE)
-                if len(atom_header) < ATOM_HEADER_SIZE:
+                data, pos = view(offset, ATOM_HEADER_SIZE + 8)
+                if len(data) - pos < ATOM_HEADER_SIZE:
                     return None
-                    
-                atom_type = atom_header[4:8]
+                
+                atom_type = data[pos + 4:pos + 8]
                 if atom_type == b'moov':
                     break  # Found moov atom
-                    
+                
                 # Get atom size and skip to next atom
-                atom_size = struct.unpack('>I', atom_header[0:4])[0]
+                atom_size = _U32.unpack_from(data, pos)[0]
                 if atom_size == 0:  # Atom extends to end of file
                     return None
                 elif atom_size == 1:  # 64-bit atom size
-                    extended_size = struct.unpack('>Q', f.read(8))[0]
-                    f.seek(extended_size - 16, 1)
+                    next_offset = offset + _U64.unpack_from(data, pos + ATOM_HEADER_SIZE)[0]
                 else:
-                    f.seek(atom_size - 8, 1)
+                    next_offset = offset + atom_size
+                
+                if next_offset <= offset:
+                    # Corrupt size that would never advance
+                    return None
+                offset = next_offset
             
             # Found 'moov', now look for 'mvhd' inside it
-            atom_header = f.read(ATOM_HEADER_SIZE)
-            if atom_header[4:8] == b'cmov':
+            data, pos = view(offset, _MOOV_PREFIX_SIZE)
+            pos += ATOM_HEADER_SIZE
+            child_type = data[pos + 4:pos + 8]
+            if child_type == b'cmov':
                 # Compressed movie atom, can't parse
                 return None
-            elif atom_header[4:8] != b'mvhd':
+            elif child_type != b'mvhd':
                 # Expected mvhd to be first atom in moov
                 return None
             
-            # Read mvhd version
-            version = f.read(1)[0]
-            f.seek(3, 1)  # Skip flags
+            # Read mvhd version; flags (3 bytes) follow it
+            pos += ATOM_HEADER_SIZE
+            if len(data) <= pos:
+                return None
+            version = data[pos]
             
             # Read creation time (32-bit for v0, 64-bit for v1)
             if version == 0:
-                creation_time = struct.unpack('>I', f.read(4))[0]
+                creation_time = _U32.unpack_from(data, pos + 4)[0]
             else:
-                creation_time = struct.unpack('>Q', f.read(8))[0]
-                
-            if creation_time > 0:
-                # Convert from QuickTime epoch to Unix epoch
-                unix_timestamp = creation_time - QUICKTIME_EPOCH_ADJUSTER
-                # Return milliseconds for consistency with message timestamps
-                return unix_timestamp * 1000
-                
+                creation_time = _U64.unpack_from(data, pos + 4)[0]
+        finally:
+            os.close(fd)
+        
+        if creation_time > 0:
+            # Convert from QuickTime epoch to Unix epoch
+            unix_timestamp = creation_time - QUICKTIME_EPOCH_ADJUSTER
+            # Return milliseconds for consistency with message timestamps
+            return unix_timestamp * 1000
+        
         return None
         
     except (IOError, OSError, struct.error) as e:
@@ -89,12 +145,59 @@ def parse_mp4_timestamp_binary(mp4_path: Path) -> Optional[int]:
         return None
 
 
+def _ffprobe_command(mp4_path: Path) -> List[str]:
+    """ffprobe command printing the streams of mp4_path as JSON."""
+    return [
+        'ffprobe',
+        '-v', 'quiet',
+        '-print_format', 'json',
+        '-show_streams',
+        str(mp4_path)
+    ]
+
+
+def _timestamp_from_ffprobe_output(output) -> Optional[int]:
+    """
+    Read the audio stream creation time from ffprobe's JSON output.
+    
+    Raises:
+        json.JSONDecodeError: If the output is not valid JSON
+        ValueError: If creation_time is not an ISO timestamp
+    """
+    data = json.loads(output)
+    
+    # Look for audio stream (usually stream 0)
+    for stream in data.get('streams', []):
+        if stream.get('codec_type') == 'audio':
+            tags = stream.get('tags', {})
+            creation_time = tags.get('creation_time')
+            
+            if creation_time:
+                # Parse ISO format timestamp
+                # Format: "2025-07-28T15:28:18.000000Z"
+                dt = datetime.fromisoformat(creation_time.replace('Z', '+00:00'))
+                # Convert to milliseconds since Unix epoch
+                return int(dt.timestamp() * 1000)
+    
+    return None
+
+
+def _ffprobe_cache_key(mp4_path: Path) -> Optional[Tuple[str, int, int]]:
+    """Cache key identifying the current version of a file, or None if it cannot be stat'ed."""
+    try:
+        st = os.stat(mp4_path)
+    except OSError:
+        return None
+    return str(mp4_path), st.st_size, st.st_mtime_ns
+
+
 def parse_mp4_timestamp_ffprobe(mp4_path: Path) -> Optional[int]:
     """
     Extract creation time from the audio stream using ffprobe.
     Adapted from snapchat_merger/audio_timestamp_matcher.py:104-151
     
-    This is the fallback method when direct parsing fails.
+    This is the fallback method when direct parsing fails. Results are
+    cached per file version.
     
     Args:
         mp4_path: The path to the MP4 file
@@ -102,34 +205,17 @@ def parse_mp4_timestamp_ffprobe(mp4_path: Path) -> Optional[int]:
     Returns:
         The creation timestamp in milliseconds since Unix epoch, or None if extraction fails
     """
+    cache_key = _ffprobe_cache_key(mp4_path)
+    if cache_key is not None and cache_key in _ffprobe_cache:
+        return _ffprobe_cache[cache_key]
+    
     try:
         # Run ffprobe to get stream information
-        cmd = [
-            'ffprobe',
-            '-v', 'quiet',
-            '-print_format', 'json',
-            '-show_streams',
-            str(mp4_path)
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True, timeout=10)
-        data = json.loads(result.stdout)
-        
-        # Look for audio stream (usually stream 0)
-        for stream in data.get('streams', []):
-            if stream.get('codec_type') == 'audio':
-                tags = stream.get('tags', {})
-                creation_time = tags.get('creation_time')
-                
-                if creation_time:
-                    # Parse ISO format timestamp
-                    # Format: "2025-07-28T15:28:18.000000Z"
-                    dt = datetime.fromisoformat(creation_time.replace('Z', '+00:00'))
-                    # Convert to milliseconds since Unix epoch
-                    return int(dt.timestamp() * 1000)
-        
-        return None
-        
+        result = subprocess.run(
+            _ffprobe_command(mp4_path),
+            capture_output=True, text=True, check=True, timeout=FFPROBE_TIMEOUT
+        )
+        timestamp = _timestamp_from_ffprobe_output(result.stdout)
     except subprocess.CalledProcessError as e:
         logger.debug(f"ffprobe failed for {mp4_path}: {e}")
         return None
@@ -142,12 +228,94 @@ def parse_mp4_timestamp_ffprobe(mp4_path: Path) -> Optional[int]:
     except Exception as e:
         logger.debug(f"Unexpected error with ffprobe for {mp4_path}: {e}")
         return None
+    
+    if cache_key is not None:
+        _ffprobe_cache[cache_key] = timestamp
+    return timestamp
+
+
+async def _ffprobe_many(mp4_paths: List[Path], concurrency: int) -> List[Optional[int]]:
+    """Run ffprobe on every path, keeping at most concurrency processes alive."""
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def probe(mp4_path: Path) -> Optional[int]:
+        async with semaphore:
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *_ffprobe_command(mp4_path),
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.DEVNULL
+                )
+            except OSError as e:
+                logger.debug(f"Could not start ffprobe for {mp4_path}: {e}")
+                return None
+            
+            try:
+                stdout, _ = await asyncio.wait_for(proc.communicate(), FFPROBE_TIMEOUT)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                logger.debug(f"ffprobe timeout for {mp4_path}")
+                return None
+            
+            if proc.returncode != 0:
+                logger.debug(f"ffprobe failed for {mp4_path} (exit code {proc.returncode})")
+                return None
+            
+            try:
+                return _timestamp_from_ffprobe_output(stdout)
+            except ValueError as e:  # includes json.JSONDecodeError
+                logger.debug(f"Failed to parse ffprobe output for {mp4_path}: {e}")
+                return None
+    
+    return await asyncio.gather(*(probe(mp4_path) for mp4_path in mp4_paths))
+
+
+def parse_mp4_timestamps_ffprobe(mp4_paths: List[Path], concurrency: int = 8) -> List[Optional[int]]:
+    """
+    Extract creation times for many files with overlapping ffprobe processes.
+    
+    Each ffprobe call is dominated by process start-up, so up to
+    concurrency calls run at once. Files probed before (same path, size
+    and mtime) are answered from the cache.
+    
+    Args:
+        mp4_paths: MP4 file paths
+        concurrency: Maximum number of ffprobe processes running at once
+        
+    Returns:
+        Timestamps in milliseconds (or None) in the same order as mp4_paths
+    """
+    keys = [_ffprobe_cache_key(mp4_path) for mp4_path in mp4_paths]
+    results: List[Optional[int]] = [None] * len(mp4_paths)
+    
+    pending = []
+    for i, key in enumerate(keys):
+        if key is not None and key in _ffprobe_cache:
+            results[i] = _ffprobe_cache[key]
+        else:
+            pending.append(i)
+    
+    if pending:
+        probed = asyncio.run(
+            _ffprobe_many([mp4_paths[i] for i in pending], max(1, concurrency))
+        )
+        for i, timestamp in zip(pending, probed):
+            results[i] = timestamp
+            if keys[i] is not None:
+                _ffprobe_cache[keys[i]] = timestamp
+    
+    return results
 
 
 def extract_mp4_timestamp(mp4_path: Path, use_ffprobe_fallback: bool = True) -> Optional[int]:
     """
     Extract MP4 creation timestamp with optional ffprobe fallback.
     
+    When the timestamp cache is enabled (see _ts_cache.configure),
+    timestamps are reused across runs while the file's size and
+    modification time are unchanged; _ts_cache.save() writes new entries.
+    
     Args:
         mp4_path: Path to the MP4 file
         use_ffprobe_fallback: Whether to fall back to ffprobe if binary parsing fails
@@ -155,12 +323,19 @@ def extract_mp4_timestamp(mp4_path: Path, use_ffprobe_fallback: bool = True) ->
     Returns:
         Timestamp in milliseconds since Unix epoch, or None if extraction fails
     """
+    # Unchanged files keep the timestamp found on an earlier run
+    timestamp = _ts_cache.get(mp4_path)
+    if timestamp is not None:
+        return timestamp
+    
     # Try direct binary parsing first (faster)
     timestamp = parse_mp4_timestamp_binary(mp4_path)
     
     # Fall back to ffprobe if needed
     if timestamp is None and use_ffprobe_fallback:
-        logger.debug(f"Binary parsing failed for {mp4_path}, trying ffprobe")
+        logger.debug("Binary parsing failed for %s, trying ffprobe", mp4_path)
         timestamp = parse_mp4_timestamp_ffprobe(mp4_path)
     
+    if timestamp is not None:
+        _ts_cache.put(mp4_path, timestamp)
     return timestamp
\ No newline at end of file
@@ -3,26 +3,91 @@ Phase 1 Orchestrator Module.
 Main entry point that coordinates all Phase 1 operations.
 """
 
-import json
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import Tuple, Dict, Any
+from typing import Any, Dict, List, Optional, Tuple
 
+from . import _ts_cache
 from .stats import Phase1Stats
-from .loader import load_conversations
-from .media_id_extractor import extract_media_ids_from_messages, extract_media_id_from_filename
-from .file_mapper import create_media_index
+from .loader import _conversation_files, load_conversations
+from .media_id_extractor import extract_media_ids_from_messages
+from .file_mapper import _is_index_entry, create_media_index
 from .timestamp_matcher import match_mp4_timestamps
 
+from utils.json_handler import load_conversation, save_json
+
 logger = logging.getLogger(__name__)
 
 
-def load_all_conversations(conversations_dir: Path, groups_dir: Path) -> Dict[str, list]:
+# The only message fields Phase 1 reads: Media IDs for ID extraction, and the
+# timestamp plus existing matches for timestamp matching
+PHASE1_MESSAGE_FIELDS = ('Media IDs', 'Created(microseconds)', 'matched_media_files')
+
+
+def _load_messages(
+    conv_file: Path,
+    fields: Optional[Tuple[str, ...]]
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """Load one conversation file as (conversation ID, messages), keeping only fields if given."""
+    data = load_conversation(conv_file)
+    # Extract conversation ID from metadata
+    conv_id = data['conversation_metadata']['conversation_id']
+    messages = data.get('messages', [])
+    if fields is not None:
+        # Project in the worker so the full message dicts of this file can be
+        # freed as soon as it is done
+        messages = [
+            {field: msg[field] for field in fields if field in msg}
+            for msg in messages
+        ]
+    return conv_id, messages
+
+
+def _scan_media(media_dir: Path) -> Tuple[List[str], int, List[Path]]:
+    """
+    List the media directory once for everything Phase 1 needs from it.
+    
+    DirEntry answers is_file() from the directory read, so no per-file
+    stat is needed.
+    
+    Returns:
+        Tuple of (names for the media index, number of files, MP4 paths)
+    """
+    index_names = []
+    all_mp4s = []
+    total_media_files = 0
+    with os.scandir(media_dir) as entries:
+        for entry in entries:
+            if _is_index_entry(entry):
+                index_names.append(entry.name)
+            if not entry.is_file():
+                continue
+            total_media_files += 1
+            if entry.name.endswith('.mp4'):
+                all_mp4s.append(Path(entry.path))
+    return index_names, total_media_files, all_mp4s
+
+
+def load_all_conversations(
+    conversations_dir: Path,
+    groups_dir: Path,
+    max_workers: int = 8,
+    fields: Optional[Tuple[str, ...]] = None
+) -> Dict[str, list]:
     """Load all conversation files from Phase 0 output directories.
     
+    Files are read and parsed (with orjson when installed) from a thread
+    pool, so disk reads overlap.
+    
     Args:
         conversations_dir: Path to output/conversations/ directory
         groups_dir: Path to output/groups/ directory
+        max_workers: Number of files loaded concurrently
+        fields: Message fields to keep (e.g. PHASE1_MESSAGE_FIELDS); by
+                default messages are returned whole
         
     Returns:
         Dictionary mapping conversation IDs to message lists
@@ -30,31 +95,13 @@ def load_all_conversations(conversations_dir: Path, groups_dir: Path) -> Dict[st
     logger.info(f"Loading conversations from {conversations_dir} and {groups_dir}")
     all_messages = {}
     
-    # Process individual conversations
-    if conversations_dir.exists():
-        for conv_folder in conversations_dir.iterdir():
-            if conv_folder.is_dir():
-                conv_file = conv_folder / 'conversation.json'
-                if conv_file.exists():
-                    with open(conv_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    # Extract conversation ID from metadata
-                    conv_id = data['conversation_metadata']['conversation_id']
-                    all_messages[conv_id] = data.get('messages', [])
-                    logger.debug(f"Loaded {len(data.get('messages', []))} messages from {conv_id}")
-    
-    # Process group conversations  
-    if groups_dir.exists():
-        for group_folder in groups_dir.iterdir():
-            if group_folder.is_dir():
-                group_file = group_folder / 'conversation.json'
-                if group_file.exists():
-                    with open(group_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    # Extract group ID from metadata
-                    group_id = data['conversation_metadata']['conversation_id']
-                    all_messages[group_id] = data.get('messages', [])
-                    logger.debug(f"Loaded {len(data.get('messages', []))} messages from group {group_id}")
+    # Individual conversations first, then groups, in directory order
+    conv_files = _conversation_files(conversations_dir) + _conversation_files(groups_dir)
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for conv_id, messages in executor.map(_load_messages, conv_files, repeat(fields)):
+            all_messages[conv_id] = messages
+            logger.debug("Loaded %d messages from %s", len(messages), conv_id)
     
     logger.info(f"Loaded {len(all_messages)} total conversations")
     return all_messages
@@ -67,7 +114,8 @@ def run_phase1(
     output_dir: Path,
     timestamp_threshold: int = 10,
     max_workers: int = 4,
-    use_parallel: bool = False
+    use_parallel: bool = False,
+    timestamp_cache: Optional[Path] = None
 ) -> Tuple[Phase1Stats, Dict[str, Any]]:
     """
     Run Phase 1: Media Mapping.
@@ -85,10 +133,13 @@ def run_phase1(
         timestamp_threshold: Threshold for timestamp matching (seconds)
         max_workers: Number of parallel workers
         use_parallel: Whether to use parallel processing
+        timestamp_cache: File that keeps extracted MP4 timestamps between
+                         runs, or None (default) to not cache them
         
     Returns:
         Tuple of (Phase1Stats, mapping_data)
     """
+    _ts_cache.configure(timestamp_cache)
     stats = Phase1Stats()
     logger.info("=" * 60)
     logger.info("Starting Phase 1: Media Mapping")
@@ -96,7 +147,11 @@ def run_phase1(
     
     # Load all conversations from individual files
     logger.info("Loading individual conversation files...")
-    messages = load_all_conversations(conversations_dir, groups_dir)
+    # Only the fields Phase 1 reads are kept, which keeps the resident
+    # message data small on large exports
+    messages = load_all_conversations(
+        conversations_dir, groups_dir, max_workers, fields=PHASE1_MESSAGE_FIELDS
+    )
     
     if not messages:
         logger.warning("No conversations found in output directories")
@@ -120,13 +175,20 @@ def run_phase1(
     # T1.2: Build file mapping index
     # ====================
     logger.info("\n--- T1.2: Building file mapping index ---")
-    media_index = create_media_index(media_dir, use_parallel=use_parallel, max_workers=max_workers)
+    # The index, the file count and the MP4 list all come from one
+    # directory read
+    if media_dir.exists():
+        index_names, total_media_files, all_mp4s = _scan_media(media_dir)
+    else:
+        index_names, total_media_files, all_mp4s = None, 0, []
+    stats.total_media_files = total_media_files
     
-    logger.info(f"Created index with {len(media_index)} Media IDs from files")
+    filename_ids: Dict[str, str] = {}
+    media_index = create_media_index(
+        media_dir, filenames=index_names, filename_ids=filename_ids
+    )
     
-    # Count total media files
-    all_media_files = list(media_dir.glob('*'))
-    stats.total_media_files = len([f for f in all_media_files if f.is_file()])
+    logger.info(f"Created index with {len(media_index)} Media IDs from files")
     
     # Calculate mapping statistics
     matched_ids = all_media_ids.intersection(set(media_index.keys()))
@@ -146,15 +208,12 @@ def run_phase1(
     # ====================
     logger.info("\n--- T1.3-T1.4: MP4 Timestamp Matching ---")
     
-    # Find MP4 files that don't have Media IDs
-    all_mp4s = list(media_dir.glob('*.mp4'))
-    mp4s_without_ids = []
-    
-    for mp4_file in all_mp4s:
-        # Check if this MP4 has a Media ID
-        media_id = extract_media_id_from_filename(mp4_file.name)
-        if not media_id or media_id not in matched_ids:
-            mp4s_without_ids.append(mp4_file)
+    # Find MP4 files that don't have matched Media IDs; each file's ID was
+    # recorded while indexing, so no filename is parsed again here
+    mp4s_without_ids = [
+        mp4_file for mp4_file in all_mp4s
+        if filename_ids.get(mp4_file.name) not in matched_ids
+    ]
     
     logger.info(f"Found {len(mp4s_without_ids)} MP4 files without matched Media IDs")
     
@@ -201,8 +260,8 @@ def run_phase1(
         'statistics': mapping_data['statistics']
     }
     
-    with open(mapping_file, 'w', encoding='utf-8') as f:
-        json.dump(serializable_data, f, indent=2)
+    # Non-ASCII is escaped, as phase1_mapping.json has always been written
+    save_json(serializable_data, mapping_file, ensure_ascii=True)
     
     logger.info(f"\nSaved mapping data to {mapping_file}")
     
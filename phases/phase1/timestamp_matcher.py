@@ -4,17 +4,29 @@ Matches MP4 files to messages based on timestamps.
 """
 
 import logging
-import threading
+from bisect import bisect_left
+from operator import itemgetter
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional, Any
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 
-from .mp4_processor import extract_mp4_timestamp
+from . import _ts_cache
+from .mp4_processor import parse_mp4_timestamp_binary, parse_mp4_timestamps_ffprobe
+
+try:
+    import numpy as np
+except ImportError:
+    # numpy is optional; without it each MP4 is matched with its own bisect
+    np = None
 
 logger = logging.getLogger(__name__)
 
+# Batches of at least this many MP4 timestamps are matched with one numpy
+# searchsorted call; below it, converting the index costs more than it saves
+VECTORIZE_MIN_FILES = 256
+
 
-def build_millisecond_index(messages: Dict[str, List[Dict[str, Any]]]) -> List[Tuple[int, str, int, Dict[str, Any]]]:
+def build_millisecond_index(messages: Dict[str, List[Dict[str, Any]]]) -> List[Tuple[int, str, int]]:
     """
     Build a sorted index of message timestamps for efficient lookup.
     NEW IMPLEMENTATION - Replaces snapchat_merger/audio_timestamp_matcher.py:207-245
@@ -24,7 +36,8 @@ def build_millisecond_index(messages: Dict[str, List[Dict[str, Any]]]) -> List[T
         messages: The message history dictionary keyed by conversation ID
         
     Returns:
-        Sorted list of (timestamp_ms, conv_id, msg_idx, message) tuples
+        Sorted list of (timestamp_ms, conv_id, msg_idx) tuples; the message
+        itself is found at messages[conv_id][msg_idx]
     """
     timestamp_index = []
     
@@ -51,19 +64,20 @@ def build_millisecond_index(messages: Dict[str, List[Dict[str, Any]]]) -> List[T
             except (TypeError, ValueError):
                 continue
                 
-            timestamp_index.append((timestamp_ms, conv_id, idx, message))
+            timestamp_index.append((timestamp_ms, conv_id, idx))
     
-    # Sort by timestamp for binary search
-    timestamp_index.sort(key=lambda x: x[0])
+    # Sort by timestamp for binary search; itemgetter keys the sort in C,
+    # and the sort is stable, so equal timestamps keep conversation order
+    timestamp_index.sort(key=itemgetter(0))
     logger.info(f"Built timestamp index with {len(timestamp_index)} messages")
     return timestamp_index
 
 
 def find_closest_message_binary(
     mp4_timestamp_ms: int,
-    timestamp_index: List[Tuple[int, str, int, Dict[str, Any]]],
+    timestamp_index: List[Tuple[int, str, int]],
     threshold_ms: int = 15000  # 15 seconds in milliseconds
-) -> Optional[Tuple[str, int, Dict[str, Any], int]]:
+) -> Optional[Tuple[str, int, int]]:
     """
     Find the message closest to the MP4 timestamp using binary search.
     ADAPT FROM: snapchat_merger/audio_timestamp_matcher.py:247-314
@@ -75,51 +89,78 @@ def find_closest_message_binary(
         threshold_ms: Maximum time difference in milliseconds to consider a match
         
     Returns:
-        A tuple of (conversation_id, message_index, message, time_diff_ms)
+        A tuple of (conversation_id, message_index, time_diff_ms)
         or None if no match found within threshold
     """
     if not timestamp_index:
         return None
     
-    # Binary search to find insertion point
-    left, right = 0, len(timestamp_index) - 1
-    
-    while left <= right:
-        mid = (left + right) // 2
-        if timestamp_index[mid][0] < mp4_timestamp_ms:
-            left = mid + 1
-        else:
-            right = mid - 1
-    
-    # Check candidates around the insertion point
-    candidates = []
-    
-    # Check left side (earlier messages)
-    idx = right
-    while idx >= 0:
-        ts_ms, conv_id, msg_idx, msg = timestamp_index[idx]
-        diff_ms = mp4_timestamp_ms - ts_ms
-        if diff_ms > threshold_ms:
-            break
-        candidates.append((conv_id, msg_idx, msg, diff_ms))
-        idx -= 1
-    
-    # Check right side (later messages)
-    idx = left
-    while idx < len(timestamp_index):
-        ts_ms, conv_id, msg_idx, msg = timestamp_index[idx]
-        diff_ms = ts_ms - mp4_timestamp_ms
-        if diff_ms > threshold_ms:
-            break
-        candidates.append((conv_id, msg_idx, msg, -diff_ms))  # Negative for later messages
-        idx += 1
-    
-    # Find closest match
-    if candidates:
-        # Sort by absolute time difference
-        return min(candidates, key=lambda x: abs(x[3]))
-    
-    return None
+    # Binary search to find insertion point. (ts,) sorts before every entry
+    # with the same timestamp, so bisect_left finds the first entry at or
+    # after ts without comparing past the timestamp field.
+    i = bisect_left(timestamp_index, (mp4_timestamp_ms,))
+    
+    # In a sorted index the closest message is one of the two entries
+    # around the insertion point; on a tie the earlier message wins
+    closest = None
+    if i > 0:
+        earlier = timestamp_index[i - 1]
+        if mp4_timestamp_ms - earlier[0] <= threshold_ms:
+            closest = earlier
+    if i < len(timestamp_index):
+        later = timestamp_index[i]
+        later_diff = later[0] - mp4_timestamp_ms
+        if later_diff <= threshold_ms and (
+            closest is None or later_diff < mp4_timestamp_ms - closest[0]
+        ):
+            closest = later
+    
+    if closest is None:
+        return None
+    
+    # Positive difference for earlier messages, negative for later ones
+    ts_ms, conv_id, msg_idx = closest
+    return (conv_id, msg_idx, mp4_timestamp_ms - ts_ms)
+
+
+def _closest_positions_vectorized(
+    mp4_timestamps: List[int],
+    timestamp_index: List[Tuple[int, str, int]],
+    threshold_ms: int
+) -> List[Optional[Tuple[int, int]]]:
+    """
+    Find the closest index entry for every MP4 timestamp in one numpy pass.
+    
+    Same rules as find_closest_message_binary: the nearest of the two
+    entries around the insertion point, the earlier one on a tie.
+    
+    Returns:
+        For each timestamp, (index position, time_diff_ms) or None when
+        nothing lies within threshold_ms
+    """
+    index_ts = np.fromiter((entry[0] for entry in timestamp_index), dtype=np.int64,
+                           count=len(timestamp_index))
+    targets = np.asarray(mp4_timestamps, dtype=np.int64)
+    n = len(index_ts)
+    
+    insert = np.searchsorted(index_ts, targets, side='left')
+    earlier = np.maximum(insert - 1, 0)
+    later = np.minimum(insert, n - 1)
+    
+    # Distances to both neighbours; a missing neighbour never wins
+    no_match = np.iinfo(np.int64).max
+    d_earlier = np.where(insert > 0, targets - index_ts[earlier], no_match)
+    d_later = np.where(insert < n, index_ts[later] - targets, no_match)
+    
+    pick_later = d_later < d_earlier
+    best = np.where(pick_later, later, earlier)
+    diff = np.where(pick_later, -d_later, d_earlier)
+    within = np.minimum(d_earlier, d_later) <= threshold_ms
+    
+    return [
+        (int(pos), int(d)) if ok else None
+        for pos, d, ok in zip(best.tolist(), diff.tolist(), within.tolist())
+    ]
 
 
 def match_mp4_timestamps(
@@ -152,42 +193,64 @@ def match_mp4_timestamps(
     threshold_ms = threshold_seconds * 1000
     matches = {}
     
-    if use_parallel and len(mp4_files) > 10:
-        lock = threading.Lock()
-        
-        def process_mp4(mp4_file: Path) -> Optional[Tuple[str, Tuple[str, int, int]]]:
-            timestamp_ms = extract_mp4_timestamp(mp4_file)
-            if not timestamp_ms:
-                return None
-                
-            match = find_closest_message_binary(timestamp_ms, timestamp_index, threshold_ms)
-            if match:
-                conv_id, msg_idx, msg, diff_ms = match
-                return (mp4_file.name, (conv_id, msg_idx, diff_ms))
-            return None
-        
+    # Files unchanged since an earlier run reuse their cached timestamp
+    timestamps: List[Optional[int]] = [_ts_cache.get(mp4_file) for mp4_file in mp4_files]
+    todo = [i for i, timestamp_ms in enumerate(timestamps) if timestamp_ms is None]
+    todo_files = [mp4_files[i] for i in todo]
+    
+    parallel = use_parallel and len(todo_files) > 10
+    if parallel:
+        # Only timestamp extraction runs in the pool: it blocks in pread,
+        # which releases the GIL. Matching against the index is cheap and
+        # stays in this thread, so results need no lock.
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [executor.submit(process_mp4, f) for f in mp4_files]
-            
-            for future in as_completed(futures):
-                result = future.result()
-                if result:
-                    filename, match_data = result
-                    with lock:
-                        matches[filename] = match_data
+            parsed = list(executor.map(parse_mp4_timestamp_binary, todo_files))
     else:
-        # Sequential processing
-        for mp4_file in mp4_files:
-            timestamp_ms = extract_mp4_timestamp(mp4_file)
-            if not timestamp_ms:
-                logger.debug(f"Could not extract timestamp from {mp4_file.name}")
-                continue
-                
-            match = find_closest_message_binary(timestamp_ms, timestamp_index, threshold_ms)
-            if match:
-                conv_id, msg_idx, msg, diff_ms = match
-                matches[mp4_file.name] = (conv_id, msg_idx, diff_ms)
-                logger.debug(f"Matched {mp4_file.name} to message with {abs(diff_ms)/1000:.1f}s difference")
+        parsed = [parse_mp4_timestamp_binary(mp4_file) for mp4_file in todo_files]
+    
+    # Fall back to ffprobe for files the binary parser could not read, with
+    # the ffprobe processes overlapping when running in parallel
+    failed = [j for j, timestamp_ms in enumerate(parsed) if timestamp_ms is None]
+    if failed:
+        logger.debug("Binary parsing failed for %d files, trying ffprobe", len(failed))
+        probed = parse_mp4_timestamps_ffprobe(
+            [todo_files[j] for j in failed], concurrency=max_workers if parallel else 1
+        )
+        for j, timestamp_ms in zip(failed, probed):
+            parsed[j] = timestamp_ms
+    
+    for i, timestamp_ms in zip(todo, parsed):
+        timestamps[i] = timestamp_ms
+        if timestamp_ms is not None:
+            _ts_cache.put(mp4_files[i], timestamp_ms)
+    _ts_cache.save()
+    
+    found = []
+    for mp4_file, timestamp_ms in zip(mp4_files, timestamps):
+        if not timestamp_ms:
+            logger.debug("Could not extract timestamp from %s", mp4_file.name)
+            continue
+        found.append((mp4_file, timestamp_ms))
+    
+    if np is not None and len(found) >= VECTORIZE_MIN_FILES:
+        # One searchsorted over all MP4 timestamps instead of a bisect each
+        positions = _closest_positions_vectorized(
+            [timestamp_ms for _, timestamp_ms in found], timestamp_index, threshold_ms
+        )
+        closest = [
+            None if hit is None else timestamp_index[hit[0]][1:3] + (hit[1],)
+            for hit in positions
+        ]
+    else:
+        closest = [
+            find_closest_message_binary(timestamp_ms, timestamp_index, threshold_ms)
+            for _, timestamp_ms in found
+        ]
+    
+    for (mp4_file, _), match in zip(found, closest):
+        if match:
+            matches[mp4_file.name] = match
+            logger.debug("Matched %s to message with %.1fs difference", mp4_file.name, abs(match[2]) / 1000)
     
     logger.info(f"Matched {len(matches)} MP4 files to messages")
     return matches
\ No newline at end of file
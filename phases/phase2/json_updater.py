@@ -4,12 +4,13 @@ Handles updating JSON files with media location references.
 """
 
 import logging
-import json
 from pathlib import Path
 from typing import Dict, Any, List
 
 from .stats import Phase2Stats
 
+from utils.json_handler import find_conversation_file, load_conversation, save_conversation
+
 logger = logging.getLogger(__name__)
 
 
@@ -89,7 +90,7 @@ def update_conversation_json(
     T2.3.3: Save updated JSON
     
     Args:
-        conversation_file: Path to conversation.json
+        conversation_file: Path to conversation.json (or messages.jsonl)
         media_files: List of media files in the conversation folder
         mapping_data: Phase 1 mapping data
         stats: Statistics object to update
@@ -99,8 +100,7 @@ def update_conversation_json(
     """
     try:
         # Load existing JSON
-        with open(conversation_file, 'r', encoding='utf-8') as f:
-            conv_data = json.load(f)
+        conv_data = load_conversation(conversation_file)
         
         # Get conversation ID
         conv_id = conv_data.get('conversation_metadata', {}).get('conversation_id')
@@ -143,9 +143,8 @@ def update_conversation_json(
             if (new_locations and not original_locations) or (new_matched and not original_matched):
                 updated_count += 1
         
-        # Save updated JSON
-        with open(conversation_file, 'w', encoding='utf-8') as f:
-            json.dump(conv_data, f, indent=2, ensure_ascii=False)
+        # Save updated JSON in the layout it was read from
+        save_conversation(conversation_file, conv_data)
         
         if updated_count > 0:
             logger.info(f"Updated {updated_count} messages with media references in {conversation_file.parent.name}")
@@ -181,8 +180,8 @@ def process_json_updates(
     if conversations_dir.exists():
         for conv_folder in conversations_dir.iterdir():
             if conv_folder.is_dir():
-                conv_file = conv_folder / "conversation.json"
-                if conv_file.exists():
+                conv_file = find_conversation_file(conv_folder)
+                if conv_file is not None:
                     # Get list of media files in the media subdirectory
                     media_dir = conv_folder / "media"
                     media_files = []
@@ -198,8 +197,8 @@ def process_json_updates(
     if groups_dir.exists():
         for group_folder in groups_dir.iterdir():
             if group_folder.is_dir():
-                group_file = group_folder / "conversation.json"
-                if group_file.exists():
+                group_file = find_conversation_file(group_folder)
+                if group_file is not None:
                     # Get list of media files in the media subdirectory
                     media_dir = group_folder / "media"
                     media_files = []
@@ -11,6 +11,8 @@ from typing import Dict, Any, List, Optional, Tuple
 
 from .stats import Phase2Stats
 
+from utils.json_handler import find_conversation_file, load_conversation
+
 logger = logging.getLogger(__name__)
 
 
@@ -48,7 +50,7 @@ def get_media_files_for_conversation(
     Get list of media files that belong to a conversation.
     
     Args:
-        conversation_file: Path to conversation.json
+        conversation_file: Path to conversation.json (or messages.jsonl)
         mapping_data: Phase 1 mapping data
         
     Returns:
@@ -60,8 +62,7 @@ def get_media_files_for_conversation(
     conv_mp4_matches = {}
     
     try:
-        with open(conversation_file, 'r', encoding='utf-8') as f:
-            conv_data = json.load(f)
+        conv_data = load_conversation(conversation_file)
         
         # Get conversation ID
         conv_id = conv_data.get('conversation_metadata', {}).get('conversation_id')
@@ -220,8 +221,8 @@ def process_all_conversations(
     if conversations_dir.exists():
         for conv_folder in conversations_dir.iterdir():
             if conv_folder.is_dir():
-                conv_file = conv_folder / "conversation.json"
-                if conv_file.exists():
+                conv_file = find_conversation_file(conv_folder)
+                if conv_file is not None:
                     # Get media files for this conversation
                     media_files, mp4_matches = get_media_files_for_conversation(conv_file, mapping_data)
                     
@@ -242,8 +243,8 @@ def process_all_conversations(
     if groups_dir.exists():
         for group_folder in groups_dir.iterdir():
             if group_folder.is_dir():
-                group_file = group_folder / "conversation.json"
-                if group_file.exists():
+                group_file = find_conversation_file(group_folder)
+                if group_file is not None:
                     # Get media files for this group
                     media_files, mp4_matches = get_media_files_for_conversation(group_file, mapping_data)
                     
@@ -46,7 +46,7 @@ def identify_unmapped_files(
         if file_path.is_file():
             if file_path.name not in mapped_filenames:
                 unmapped_files.append(file_path)
-                logger.debug(f"Unmapped file: {file_path.name}")
+                logger.debug("Unmapped file: %s", file_path.name)
     
     logger.info(f"Found {len(unmapped_files)} unmapped files")
     return unmapped_files
@@ -80,7 +80,7 @@ def move_orphaned_files(
             shutil.move(str(source_file), str(target_file))
             moved_files.append(source_file.name)
             stats.files_orphaned += 1
-            logger.debug(f"Moved orphaned file: {source_file.name}")
+            logger.debug("Moved orphaned file: %s", source_file.name)
             
         except Exception as e:
             logger.error(f"Failed to move orphaned file {source_file.name}: {e}")
@@ -173,7 +173,7 @@ def identify_uncopied_files(
     for file_path in temp_media_dir.iterdir():
         if file_path.is_file():
             uncopied_files.append(file_path)
-            logger.debug(f"Uncopied file: {file_path.name}")
+            logger.debug("Uncopied file: %s", file_path.name)
     
     logger.info(f"Found {len(uncopied_files)} uncopied files")
     return uncopied_files
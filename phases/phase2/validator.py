@@ -11,6 +11,8 @@ from datetime import datetime
 
 from .stats import Phase2Stats
 
+from utils.json_handler import find_conversation_file, load_conversation
+
 logger = logging.getLogger(__name__)
 
 
@@ -101,10 +103,9 @@ def check_media_references(
     if conversations_dir.exists():
         for conv_folder in conversations_dir.iterdir():
             if conv_folder.is_dir():
-                conv_file = conv_folder / "conversation.json"
-                if conv_file.exists():
-                    with open(conv_file, 'r', encoding='utf-8') as f:
-                        conv_data = json.load(f)
+                conv_file = find_conversation_file(conv_folder)
+                if conv_file is not None:
+                    conv_data = load_conversation(conv_file)
                     
                     for message in conv_data.get('messages', []):
                         for location in message.get('media_locations', []):
@@ -118,10 +119,9 @@ def check_media_references(
     if groups_dir.exists():
         for group_folder in groups_dir.iterdir():
             if group_folder.is_dir():
-                group_file = group_folder / "conversation.json"
-                if group_file.exists():
-                    with open(group_file, 'r', encoding='utf-8') as f:
-                        group_data = json.load(f)
+                group_file = find_conversation_file(group_folder)
+                if group_file is not None:
+                    group_data = load_conversation(group_file)
                     
                     for message in group_data.get('messages', []):
                         for location in message.get('media_locations', []):
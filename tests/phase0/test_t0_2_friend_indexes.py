@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script for T0.2 - Friend Indexes
+Tests reading friends.json with and without ijson streaming.
+"""
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+# Add the snapchat-new directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from core.metadata_extractor import load_friends_data, build_friend_indexes
+from utils import json_handler
+from utils.json_handler import iter_json_items
+
+
+def create_test_friends_data():
+    """Create friends.json content with friend lists and unrelated sections."""
+    return {
+        "Friends": [
+            {
+                "Username": "john_doe",
+                "Display Name": "John Dœ",
+                "Creation Timestamp": "2020-01-01 10:00:00 UTC",
+                "Last Modified Timestamp": "2021-01-01 10:00:00 UTC",
+                "Source": "Added by username"
+            },
+            {
+                "Username": "jane",
+                "Creation Timestamp": "2020-02-01 10:00:00 UTC",
+                "Last Modified Timestamp": "2021-02-01 10:00:00 UTC",
+                "Source": "Added by Quick Add"
+            }
+        ],
+        "Friend Requests Sent": [
+            {"Username": "pending_user", "Display Name": "Pending"}
+        ],
+        "Blocked Users": [],
+        "Deleted Friends": [
+            {
+                "Username": "old_friend",
+                "Display Name": "Old Friend",
+                "Creation Timestamp": "2019-01-01 10:00:00 UTC",
+                "Last Modified Timestamp": "2019-06-01 10:00:00 UTC",
+                "Source": "Added by username",
+                "Score": 1.5
+            }
+        ],
+        "Hidden Friend Suggestions": [
+            {"Username": "suggested", "Display Name": "Suggested"}
+        ]
+    }
+
+
+def test_iter_json_items_streaming():
+    """Test that the ijson branch yields the same items as a full load."""
+    print("\n[TEST] Testing streamed top-level items...")
+    
+    if json_handler.ijson is None:
+        print("  ⚠ ijson not installed, skipping streaming test")
+        return
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        friends_path = Path(temp_dir) / "friends.json"
+        with open(friends_path, 'w', encoding='utf-8') as f:
+            json.dump(create_test_friends_data(), f, ensure_ascii=False)
+        
+        loaded = list(iter_json_items(friends_path, stream=False))
+        streamed = list(iter_json_items(friends_path, stream=True))
+        
+        assert streamed == loaded, "Streamed items differ from the full load"
+        assert [key for key, _ in streamed] == list(create_test_friends_data()), \
+            "Items should come in file order"
+        score = dict(streamed)["Deleted Friends"][0]["Score"]
+        assert type(score) is float, f"Numbers should not be Decimal: {type(score)}"
+        print(f"  ✓ {len(streamed)} top-level items match the full load")
+
+
+def test_friend_sections_streamed():
+    """Test that friend indexes are the same when friends.json is streamed."""
+    print("\n[TEST] Testing friend indexes from a streamed friends.json...")
+    
+    if json_handler.ijson is None:
+        print("  ⚠ ijson not installed, skipping streaming test")
+        return
+    
+    friends_data = create_test_friends_data()
+    expected_indexes = build_friend_indexes(friends_data)
+    expected_map = load_friends_data(friends_data)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        friends_path = Path(temp_dir) / "friends.json"
+        with open(friends_path, 'w', encoding='utf-8') as f:
+            json.dump(friends_data, f, ensure_ascii=False)
+        
+        # Stream every file, however small
+        original_min_bytes = json_handler.STREAM_MIN_BYTES
+        json_handler.STREAM_MIN_BYTES = 0
+        try:
+            friends_map = load_friends_data(friends_path)
+        finally:
+            json_handler.STREAM_MIN_BYTES = original_min_bytes
+    
+    assert friends_map == expected_map, "Streamed friends_map differs"
+    assert set(friends_map) == {"john_doe", "jane", "old_friend"}, \
+        f"Only friend list sections should be read: {sorted(friends_map)}"
+    assert friends_map["old_friend"].friend_status == "deleted"
+    assert expected_indexes[1] == expected_map
+    assert expected_indexes[0] == {"john_doe": "John Dœ"}
+    print(f"  ✓ {len(friends_map)} friends read from the streamed file")
+
+
+def main():
+    """Run all tests for T0.2."""
+    print("=" * 60)
+    print("T0.2: Friend Indexes - Test Suite")
+    print("=" * 60)
+    
+    try:
+        test_iter_json_items_streaming()
+        test_friend_sections_streamed()
+        
+        print("\n" + "=" * 60)
+        print("✅ ALL T0.2 TESTS PASSED!")
+        print("=" * 60)
+    
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script for T0.3 - History Validation
+Tests that chat and snap histories are validated per conversation while
+they stream into the merge, with the same outcome as validating the whole
+history at once.
+"""
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+# Add the snapchat-new directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from phases.phase0.orchestrator import _checked_history
+from utils import json_handler
+from utils.json_handler import iter_json_items, validate_chat_history, validate_snap_history
+
+
+def create_test_message(sender="john_doe"):
+    """Create a message with every required field."""
+    return {
+        "From": sender,
+        "Media Type": "TEXT",
+        "Created": "2024-01-15 10:30:00 UTC",
+        "IsSender": False,
+        "Content": "Hello!"
+    }
+
+
+def create_test_histories():
+    """Histories covering valid, empty and invalid conversations."""
+    missing_field = create_test_message()
+    del missing_field["IsSender"]
+    return [
+        {},
+        {"john_doe": [create_test_message()], "jane": []},
+        {"john_doe": [create_test_message()], "jane": [missing_field]},
+        {"john_doe": {"not": "a list"}, "jane": [create_test_message("jane")]},
+        {"a": [missing_field], "b": [missing_field]}
+    ]
+
+
+def test_per_conversation_matches_whole_history():
+    """Test that per-conversation validation agrees with whole-history validation."""
+    print("\n[TEST] Testing per-conversation validation...")
+    
+    for validate in (validate_chat_history, validate_snap_history):
+        for history in create_test_histories():
+            results = []
+            
+            def recording_validate(data):
+                result = validate(data)
+                results.append(result)
+                return result
+            
+            totals = {}
+            passed = list(_checked_history(history.items(), recording_validate, "History", totals))
+            
+            assert passed == list(history.items()), "Pairs should pass through unchanged"
+            # Validation stops at the first failing conversation
+            assert False not in results[:-1], "Validation should stop after a failure"
+            assert all(results) == validate(history), \
+                f"{validate.__name__} disagrees on {list(history)}"
+            assert totals["History"] == sum(len(messages) for messages in history.values())
+    
+    print("  ✓ Per-conversation results match whole-history validation")
+
+
+def test_non_object_history_rejected():
+    """Test that a history file that is not a JSON object is rejected."""
+    print("\n[TEST] Testing non-object history files...")
+    
+    modes = [False]
+    if json_handler.ijson is not None:
+        modes.append(True)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        history_path = Path(temp_dir) / "chat_history.json"
+        with open(history_path, 'w', encoding='utf-8') as f:
+            f.write("  \n")
+            json.dump([create_test_message()], f)
+        
+        for stream in modes:
+            try:
+                list(iter_json_items(history_path, stream=stream))
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f"Array document accepted (stream={stream})")
+            print(f"  ✓ Array document rejected (stream={stream})")
+
+
+def main():
+    """Run all tests for T0.3."""
+    print("=" * 60)
+    print("T0.3: History Validation - Test Suite")
+    print("=" * 60)
+    
+    try:
+        test_per_conversation_matches_whole_history()
+        test_non_object_history_rejected()
+        
+        print("\n" + "=" * 60)
+        print("✅ ALL T0.3 TESTS PASSED!")
+        print("=" * 60)
+    
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
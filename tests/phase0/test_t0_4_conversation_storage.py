@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Test script for T0.4 - Conversation Storage
+Tests the conversation.json and metadata.json + messages.jsonl layouts.
+"""
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+# Add the snapchat-new directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from utils.json_handler import (
+    CONVERSATION_FILES,
+    find_conversation_file,
+    load_conversation,
+    save_conversation
+)
+
+
+def create_test_conversation():
+    """Create a conversation with metadata, media and non-ASCII text."""
+    return {
+        "conversation_metadata": {
+            "conversation_id": "john_doe",
+            "conversation_type": "individual",
+            "participants": [{"username": "john_doe", "display_name": "John Dœ"}],
+            "total_messages": 3
+        },
+        "messages": [
+            {
+                "From": "john_doe",
+                "Media Type": "TEXT",
+                "Created": "2024-01-15 10:30:00 UTC",
+                "Content": "Hæ! 👋\nSecond line",
+                "Media IDs": "",
+                "Created(microseconds)": 1705314600000,
+                "IsSender": False,
+                "Type": "message"
+            },
+            {
+                "From": "me",
+                "Media Type": "IMAGE",
+                "Created": "2024-01-15 10:35:00 UTC",
+                "Content": None,
+                "Media IDs": "media_001 | media_002",
+                "Created(microseconds)": 1705314900000,
+                "IsSender": True,
+                "Type": "snap"
+            },
+            {
+                "From": "john_doe",
+                "Media Type": "NOTE",
+                "Created": "2024-01-15 10:40:00 UTC",
+                "Content": "",
+                "Media IDs": "media_003",
+                "Created(microseconds)": 1705315200000,
+                "IsSender": False,
+                "Type": "message"
+            }
+        ]
+    }
+
+
+def test_json_round_trip():
+    """Test saving and loading the single-file layout."""
+    print("\n[TEST] Testing conversation.json round trip...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        conv_file = Path(temp_dir) / "john_doe" / CONVERSATION_FILES["json"]
+        conv_data = create_test_conversation()
+        
+        save_conversation(conv_file, conv_data)
+        
+        assert sorted(p.name for p in conv_file.parent.iterdir()) == ["conversation.json"]
+        assert load_conversation(conv_file) == conv_data, "Loaded conversation differs"
+        print("  ✓ conversation.json round trip preserved all data")
+
+
+def test_jsonl_round_trip():
+    """Test saving and loading the metadata.json + messages.jsonl layout."""
+    print("\n[TEST] Testing messages.jsonl round trip...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        conv_file = Path(temp_dir) / "john_doe" / CONVERSATION_FILES["jsonl"]
+        conv_data = create_test_conversation()
+        
+        save_conversation(conv_file, conv_data)
+        
+        conv_dir = conv_file.parent
+        assert sorted(p.name for p in conv_dir.iterdir()) == ["messages.jsonl", "metadata.json"]
+        
+        # metadata.json holds the bare metadata object
+        with open(conv_dir / "metadata.json", 'r', encoding='utf-8') as f:
+            assert json.load(f) == conv_data["conversation_metadata"]
+        
+        # messages.jsonl holds one message per line, in order
+        lines = conv_file.read_bytes().splitlines()
+        assert len(lines) == 3, f"Expected one line per message, got {len(lines)}"
+        assert [json.loads(line) for line in lines] == conv_data["messages"]
+        
+        assert load_conversation(conv_file) == conv_data, "Loaded conversation differs"
+        print("  ✓ messages.jsonl round trip preserved all data")
+
+
+def test_find_conversation_file():
+    """Test which file find_conversation_file picks in each layout."""
+    print("\n[TEST] Testing find_conversation_file()...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        conv_dir = Path(temp_dir)
+        conv_data = create_test_conversation()
+        
+        assert find_conversation_file(conv_dir) is None, "Empty folder should have no file"
+        print("  ✓ No file found in an empty folder")
+        
+        save_conversation(conv_dir / "messages.jsonl", conv_data)
+        assert find_conversation_file(conv_dir) == conv_dir / "messages.jsonl"
+        print("  ✓ messages.jsonl found in the JSONL layout")
+        
+        # metadata.json alone is not a conversation file
+        (conv_dir / "messages.jsonl").unlink()
+        assert find_conversation_file(conv_dir) is None, "metadata.json alone should not match"
+        
+        # With both layouts present, conversation.json is preferred
+        save_conversation(conv_dir / "messages.jsonl", conv_data)
+        save_conversation(conv_dir / "conversation.json", conv_data)
+        assert find_conversation_file(conv_dir) == conv_dir / "conversation.json"
+        print("  ✓ conversation.json preferred when both layouts exist")
+
+
+def main():
+    """Run all tests for T0.4."""
+    print("=" * 60)
+    print("T0.4: Conversation Storage - Test Suite")
+    print("=" * 60)
+    
+    try:
+        test_json_round_trip()
+        test_jsonl_round_trip()
+        test_find_conversation_file()
+        
+        print("\n" + "=" * 60)
+        print("✅ ALL T0.4 TESTS PASSED!")
+        print("=" * 60)
+    
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -42,6 +42,11 @@ def test_split_pipe_separated_ids():
     assert result == ["id1", "id2", "id3"], f"Extra spaces failed: {result}"
     print("✅ Extra spaces test passed")
     
+    # Test case 6: Only " | " separates IDs; a bare pipe is part of the ID
+    result = split_pipe_separated_ids("id1|id2 | id3")
+    assert result == ["id1|id2", "id3"], f"Bare pipe failed: {result}"
+    print("✅ Bare pipe test passed")
+    
     print("All split_pipe_separated_ids tests passed!\n")
 
 
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test script for T1.3.1 - MP4 timestamp cache.
+Tests that the cache is off by default, persists entries to the configured
+file, and drops entries for files that no longer exist.
+"""
+
+import os
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+# Add the snapchat-new directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from phases.phase1 import _ts_cache
+
+
+def test_disabled_cache():
+    """Test that nothing is cached or written while no cache file is configured."""
+    print("\n[TEST] Testing disabled timestamp cache...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        mp4_file = Path(temp_dir) / "video.mp4"
+        mp4_file.write_bytes(b"\x00" * 16)
+        
+        _ts_cache.configure(None)
+        assert _ts_cache.cache_path() is None, "Cache should be disabled"
+        
+        _ts_cache.put(mp4_file, 1700000000000)
+        _ts_cache.save()
+        assert _ts_cache.get(mp4_file) is None, "Disabled cache should never hit"
+        assert sorted(p.name for p in Path(temp_dir).iterdir()) == ["video.mp4"], \
+            "Disabled cache should not write any file"
+        
+        print("  ✓ Disabled cache neither stores nor writes entries")
+
+
+def test_cache_round_trip():
+    """Test that saved timestamps are reused while the file is unchanged."""
+    print("\n[TEST] Testing timestamp cache round trip...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        cache_file = temp_path / "cache" / "mp4_timestamps.json"
+        mp4_file = temp_path / "video.mp4"
+        mp4_file.write_bytes(b"\x00" * 16)
+        
+        _ts_cache.configure(cache_file)
+        assert _ts_cache.get(mp4_file) is None, "Empty cache should miss"
+        _ts_cache.put(mp4_file, 1700000000000)
+        _ts_cache.save()
+        assert cache_file.exists(), "Cache file should be written by save()"
+        print("  ✓ save() writes the configured cache file")
+        
+        # A new run reads the file back
+        _ts_cache.configure(cache_file)
+        assert _ts_cache.get(mp4_file) == 1700000000000, "Unchanged file should hit"
+        print("  ✓ Cached timestamp reused on the next run")
+        
+        # A changed file is not served from the cache
+        mp4_file.write_bytes(b"\x00" * 32)
+        assert _ts_cache.get(mp4_file) is None, "Changed file should miss"
+        print("  ✓ Changed file is not served from the cache")
+        
+        _ts_cache.configure(None)
+
+
+def test_stale_entries_pruned():
+    """Test that entries for deleted files are dropped from the cache file."""
+    print("\n[TEST] Testing stale entry pruning...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        cache_file = temp_path / "mp4_timestamps.json"
+        kept = temp_path / "kept.mp4"
+        deleted = temp_path / "deleted.mp4"
+        kept.write_bytes(b"\x00" * 16)
+        deleted.write_bytes(b"\x00" * 16)
+        
+        _ts_cache.configure(cache_file)
+        _ts_cache.put(kept, 1700000000000)
+        _ts_cache.put(deleted, 1700000001000)
+        _ts_cache.save()
+        
+        deleted.unlink()
+        
+        # Loading the cache drops the missing file; saving rewrites it without it
+        _ts_cache.configure(cache_file)
+        assert _ts_cache.get(kept) == 1700000000000, "Existing file should still hit"
+        _ts_cache.save()
+        
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        assert list(entries) == [os.path.abspath(kept)], \
+            f"Only the existing file should remain: {list(entries)}"
+        print("  ✓ Entries for deleted files are pruned")
+        
+        _ts_cache.configure(None)
+
+
+def main():
+    """Run all tests for T1.3.1."""
+    print("=" * 60)
+    print("T1.3.1: MP4 Timestamp Cache - Test Suite")
+    print("=" * 60)
+    
+    try:
+        test_disabled_cache()
+        test_cache_round_trip()
+        test_stale_entries_pruned()
+        
+        print("\n" + "=" * 60)
+        print("✅ ALL T1.3.1 TESTS PASSED!")
+        print("=" * 60)
+    
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,7 @@ from phases.phase1 import (
     match_mp4_timestamps,
     extract_mp4_timestamp
 )
+from phases.phase1 import timestamp_matcher
 
 # Set up logging to see debug messages
 logging.basicConfig(level=logging.INFO, format='%(message)s')
@@ -67,9 +68,9 @@ def test_build_millisecond_index():
     if timestamp_index:
         # Show some examples
         print("\nFirst 5 messages in index:")
-        for i, (ts_ms, conv_id, msg_idx, msg) in enumerate(timestamp_index[:5]):
+        for i, (ts_ms, conv_id, msg_idx) in enumerate(timestamp_index[:5]):
             dt = datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc)
-            msg_type = msg.get('Content Type', 'unknown')
+            msg_type = messages[conv_id][msg_idx].get('Content Type', 'unknown')
             print(f"  {i+1}. {dt.strftime('%Y-%m-%d %H:%M:%S')} UTC - {msg_type}")
         
         # Check timestamp ordering
@@ -105,7 +106,7 @@ def test_binary_search_matching(timestamp_index):
     match = find_closest_message_binary(test_ts_ms, timestamp_index, threshold_ms=10000)
     
     if match:
-        conv_id, msg_idx, msg, diff_ms = match
+        conv_id, msg_idx, diff_ms = match
         print(f"✅ Found exact match:")
         print(f"   Conversation: {conv_id[:30]}...")
         print(f"   Message index: {msg_idx}")
@@ -116,7 +117,7 @@ def test_binary_search_matching(timestamp_index):
     match = find_closest_message_binary(offset_ts_ms, timestamp_index, threshold_ms=10000)
     
     if match:
-        conv_id, msg_idx, msg, diff_ms = match
+        conv_id, msg_idx, diff_ms = match
         print(f"\n✅ Found match with 5s offset:")
         print(f"   Time difference: {diff_ms/1000:.3f} seconds")
     
@@ -196,6 +197,59 @@ def test_mp4_timestamp_matching():
     return matches
 
 
+def test_scalar_and_vectorized_paths_agree():
+    """Both matching paths return (conv_id, msg_idx, diff_ms) for the same MP4 timestamps."""
+    print("\nTesting scalar and vectorized matching paths...")
+    print("=" * 60)
+    
+    messages = {
+        'alice': [{'Created(microseconds)': 1_700_000_000_000},
+                  {'Created(microseconds)': 1_700_000_020_000}],
+        'bob': [{'Created(microseconds)': 1_700_000_010_000},
+                {'Created(microseconds)': 1_700_000_020_000}]
+    }
+    timestamp_index = build_millisecond_index(messages)
+    assert all(len(entry) == 3 for entry in timestamp_index)
+    
+    # Exact hit, earlier/later neighbours, a tie, both ends and a miss
+    mp4_timestamps = [
+        1_700_000_000_000, 1_700_000_004_000, 1_700_000_006_000,
+        1_700_000_015_000, 1_699_999_995_000, 1_700_000_024_000,
+        1_700_000_100_000
+    ]
+    threshold_ms = 5000
+    
+    scalar = [
+        find_closest_message_binary(ts, timestamp_index, threshold_ms)
+        for ts in mp4_timestamps
+    ]
+    assert scalar == [
+        ('alice', 0, 0),
+        ('alice', 0, 4000),
+        ('bob', 0, -4000),
+        ('bob', 0, 5000),
+        ('alice', 0, -5000),
+        ('bob', 1, 4000),
+        None
+    ], scalar
+    
+    if timestamp_matcher.np is None:
+        print("numpy not installed, vectorized path skipped")
+        return
+    
+    # The same conversion match_mp4_timestamps applies to vectorized hits
+    positions = timestamp_matcher._closest_positions_vectorized(
+        mp4_timestamps, timestamp_index, threshold_ms
+    )
+    vectorized = [
+        None if hit is None else timestamp_index[hit[0]][1:3] + (hit[1],)
+        for hit in positions
+    ]
+    assert vectorized == scalar, vectorized
+    
+    print("✅ Scalar and vectorized paths agree")
+
+
 def test_performance():
     """Test performance of timestamp matching."""
     print("\nTesting performance...")
@@ -244,6 +298,7 @@ def main():
         test_binary_search_matching(timestamp_index)
     
     matches = test_mp4_timestamp_matching()
+    test_scalar_and_vectorized_paths_agree()
     test_performance()
     
     print("\n" + "=" * 60)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test script for T1.5.1 - Phase 1 message projection.
+Tests that loading only PHASE1_MESSAGE_FIELDS gives the same Phase 1 result
+as loading whole messages.
+"""
+
+import sys
+import struct
+import tempfile
+from pathlib import Path
+
+# Add the snapchat-new directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from phases.phase1 import orchestrator
+from phases.phase1.orchestrator import run_phase1
+from utils.json_handler import save_conversation
+
+QUICKTIME_EPOCH_ADJUSTER = 2082844800
+
+
+def create_mp4(path, unix_seconds):
+    """Write a minimal MP4 whose mvhd creation time is unix_seconds."""
+    ftyp = struct.pack('>I4s4sI', 16, b'ftyp', b'isom', 0)
+    mvhd_body = struct.pack('>B3sI', 0, b'\x00\x00\x00', unix_seconds + QUICKTIME_EPOCH_ADJUSTER)
+    mvhd_body += b'\x00' * (100 - len(mvhd_body))
+    mvhd = struct.pack('>I4s', 8 + len(mvhd_body), b'mvhd') + mvhd_body
+    moov = struct.pack('>I4s', 8 + len(mvhd), b'moov') + mvhd
+    path.write_bytes(ftyp + moov)
+
+
+def create_message(sender, created_ms, media_ids="", **extra):
+    """Create a message with the fields Phase 0 writes."""
+    message = {
+        "From": sender,
+        "Media Type": "MEDIA" if media_ids else "TEXT",
+        "Created": "2024-01-15 10:30:00 UTC",
+        "Content": "Hæ" if not media_ids else None,
+        "Conversation Title": None,
+        "IsSender": sender == "me",
+        "Media IDs": media_ids,
+        "Created(microseconds)": created_ms,
+        "Type": "message"
+    }
+    message.update(extra)
+    return message
+
+
+def create_test_export(root):
+    """Write Phase 0 style conversation folders and a media directory."""
+    conversations = {
+        ("conversations", "john_doe"): [
+            create_message("john_doe", 1705314600000),
+            create_message("me", 1705314700000, "b~AAA111 | media~BBB222"),
+            create_message("john_doe", 1705314800000, "b~CCC333"),
+            # Already matched: must be skipped by timestamp matching
+            create_message("me", 1705315000000, "", matched_media_files=["earlier.mp4"]),
+            create_message("john_doe", 1705315200000, "", **{"Saved By": "john_doe"})
+        ],
+        ("groups", "group_one"): [
+            create_message("alice", 1705320000000, "media~zip-DDD444"),
+            create_message("me", 1705320300000, " | b~EEE555 | "),
+            create_message("alice", 1705320600000)
+        ]
+    }
+    for (folder, conv_id), messages in conversations.items():
+        conv_file = root / folder / f"2024-01-15 - {conv_id}" / "conversation.json"
+        save_conversation(conv_file, {
+            "conversation_metadata": {
+                "conversation_id": conv_id,
+                "conversation_type": "group" if folder == "groups" else "individual",
+                "participants": [],
+                "total_messages": len(messages)
+            },
+            "messages": messages
+        })
+    
+    media_dir = root / "media"
+    media_dir.mkdir()
+    for name in ("2024-01-15_b~AAA111.jpg", "2024-01-15_media~BBB222.mp4",
+                 "2024-01-15_media~zip-DDD444.jpg", "2024-01-15_b~ORPHAN9.jpg"):
+        (media_dir / name).write_bytes(b"\x00" * 16)
+    # MP4s without IDs: near an unmatched message, near an already matched
+    # message, and far from every message
+    create_mp4(media_dir / "2024-01-15_clip1.mp4", 1705315202)
+    create_mp4(media_dir / "2024-01-15_clip2.mp4", 1705315000)
+    create_mp4(media_dir / "2024-01-15_clip3.mp4", 1705320598)
+    create_mp4(media_dir / "2024-01-15_clip4.mp4", 1700000000)
+    return media_dir
+
+
+def _comparable(mapping_data):
+    """Mapping data with its set-derived lists in a fixed order."""
+    return {
+        key: sorted(value) if isinstance(value, list) else value
+        for key, value in mapping_data.items()
+    }
+
+
+def test_projection_matches_full_messages():
+    """Test that run_phase1 gives the same result with and without the projection."""
+    print("\n[TEST] Testing Phase 1 with and without message projection...")
+    
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        media_dir = create_test_export(root)
+        
+        original_fields = orchestrator.PHASE1_MESSAGE_FIELDS
+        try:
+            for label, fields in (("projected", original_fields), ("full", None)):
+                orchestrator.PHASE1_MESSAGE_FIELDS = fields
+                output_dir = root / f"output_{label}"
+                stats, mapping_data = run_phase1(
+                    root / "conversations", root / "groups", media_dir, output_dir
+                )
+                mapping_file = (output_dir / "phase1_mapping.json").read_text(encoding='utf-8')
+                results[label] = (stats.to_dict(), _comparable(mapping_data), len(mapping_file))
+        finally:
+            orchestrator.PHASE1_MESSAGE_FIELDS = original_fields
+    
+    projected_stats, projected_mapping, projected_size = results["projected"]
+    full_stats, full_mapping, full_size = results["full"]
+    
+    assert projected_stats == full_stats, f"Stats differ: {projected_stats} != {full_stats}"
+    print(f"  ✓ Statistics match: {projected_stats['ids_mapped']} IDs mapped")
+    
+    assert projected_mapping == full_mapping, "Mapping data differs"
+    assert projected_size == full_size, "phase1_mapping.json differs in size"
+    print("  ✓ Mapping data matches")
+    
+    # The test only means something if every field was exercised
+    assert projected_stats['pipe_separated_count'] > 0, "No pipe-separated IDs extracted"
+    assert projected_mapping['orphaned_files'] == ["b~ORPHAN9"]
+    assert sorted(projected_mapping['mp4_matches']) == ["2024-01-15_clip1.mp4", "2024-01-15_clip3.mp4"], \
+        f"Unexpected MP4 matches: {projected_mapping['mp4_matches']}"
+    print(f"  ✓ {len(projected_mapping['mp4_matches'])} MP4s matched by timestamp, "
+          "already matched message skipped")
+
+
+def main():
+    """Run all tests for T1.5.1."""
+    print("=" * 60)
+    print("T1.5.1: Phase 1 Message Projection - Test Suite")
+    print("=" * 60)
+    
+    try:
+        test_projection_matches_full_messages()
+        
+        print("\n" + "=" * 60)
+        print("✅ ALL T1.5.1 TESTS PASSED!")
+        print("=" * 60)
+    
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
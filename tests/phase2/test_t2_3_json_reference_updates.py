@@ -17,6 +17,7 @@ from phases.phase2 import (
     process_json_updates,
     Phase2Stats
 )
+from utils.json_handler import find_conversation_file, load_conversation, save_conversation
 
 
 def create_test_conversation_with_media():
@@ -305,6 +306,60 @@ def test_validation():
         print("  ✓ Reference validation complete")
 
 
+def test_update_jsonl_conversation():
+    """Test that Phase 2 rewrites a JSONL conversation in its own layout."""
+    print("\n[TEST] Testing JSONL conversation updates...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_dir = Path(temp_dir) / "output"
+        
+        # Group stored as metadata.json + messages.jsonl, with its media
+        group_dir = output_dir / "groups" / "2024-01-15 - Weekend"
+        media_dir = group_dir / "media"
+        media_dir.mkdir(parents=True)
+        conv_data = create_test_conversation_with_media()
+        conv_data["conversation_metadata"]["conversation_id"] = "group_1"
+        save_conversation(group_dir / "messages.jsonl", conv_data)
+        
+        for filename in ["2024-01-15_media_001.jpg", "2024-01-15_media_003.png", "2024-01-15_clip.mp4"]:
+            (media_dir / filename).write_text(f"content of {filename}")
+        
+        mapping_data = {
+            "media_index": {
+                "media_001": "2024-01-15_media_001.jpg",
+                "media_003": "2024-01-15_media_003.png"
+            },
+            "mp4_matches": {
+                "2024-01-15_clip.mp4": {"conv_id": "group_1", "msg_idx": 3, "diff_ms": -1500}
+            }
+        }
+        
+        stats = Phase2Stats()
+        process_json_updates(output_dir, mapping_data, stats)
+        
+        # The layout is kept: no conversation.json appears
+        assert sorted(p.name for p in group_dir.iterdir()) == ["media", "messages.jsonl", "metadata.json"], \
+            f"Layout changed: {sorted(p.name for p in group_dir.iterdir())}"
+        assert find_conversation_file(group_dir) == group_dir / "messages.jsonl"
+        print("  ✓ Conversation kept in the metadata.json + messages.jsonl layout")
+        
+        updated = load_conversation(group_dir / "messages.jsonl")
+        assert updated["conversation_metadata"] == conv_data["conversation_metadata"], \
+            "Metadata should be unchanged"
+        messages = updated["messages"]
+        assert len(messages) == 4, f"Expected 4 messages, got {len(messages)}"
+        assert messages[0]["media_locations"] == []
+        assert messages[1]["media_locations"] == ["media/2024-01-15_media_001.jpg"]
+        assert messages[2]["media_locations"] == ["media/2024-01-15_media_003.png"]
+        assert messages[3]["media_locations"] == ["media/2024-01-15_clip.mp4"]
+        assert messages[3]["time_diff_seconds"] == 1.5
+        
+        # Still one JSON message per line
+        lines = (group_dir / "messages.jsonl").read_bytes().splitlines()
+        assert [json.loads(line) for line in lines] == messages
+        print("  ✓ Media references written back into messages.jsonl")
+
+
 def test_with_real_data_structure():
     """Test with structure similar to real Snapchat data."""
     print("\n[TEST] Testing with real data structure...")
@@ -342,6 +397,7 @@ def main():
         test_update_conversation_json()
         test_process_json_updates()
         test_validation()
+        test_update_jsonl_conversation()
         test_with_real_data_structure()
         
         print("\n" + "=" * 60)
@@ -3,14 +3,118 @@ File operations utilities for Snapchat Merger V2
 Simplified from snapchat_merger/file_operations.py
 """
 
+import os
 import shutil
+import sys
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable, Tuple
 import hashlib
 
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows; reflinks then fall back to copying
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
+# How media files are brought into the temp directory:
+#   copy     - regular byte copy
+#   reflink  - copy-on-write clone (Btrfs/XFS on Linux, APFS on macOS)
+#   hardlink - hard link to the source file
+# reflink and hardlink fall back to a regular copy when unsupported
+COPY_MODES = ("copy", "reflink", "hardlink")
+
+# ioctl request number for FICLONE from <linux/fs.h>
+_FICLONE = 0x40049409
+
+
+@lru_cache(maxsize=None)
+def _get_clonefile() -> Optional[Callable[..., int]]:
+    """Look up macOS clonefile(2) through ctypes, or None if unavailable."""
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        clonefile = libc.clonefile
+    except (OSError, AttributeError):
+        return None
+    clonefile.argtypes = (ctypes.c_char_p, ctypes.c_char_p, ctypes.c_uint32)
+    clonefile.restype = ctypes.c_int
+    return clonefile
+
+
+def reflink_file(source: str, dest: str) -> bool:
+    """
+    Clone a file with copy-on-write so no data blocks are copied.
+    
+    Args:
+        source: Source file path
+        dest: Destination file path (must not exist on macOS)
+        
+    Returns:
+        True if the clone was made, False if the platform or filesystem
+        does not support it (dest is then left absent)
+    """
+    if sys.platform == "darwin":
+        clonefile = _get_clonefile()
+        if clonefile is None:
+            return False
+        # clonefile also carries over permissions and timestamps
+        return clonefile(os.fsencode(source), os.fsencode(dest), 0) == 0
+    
+    if fcntl is None:
+        return False
+    
+    try:
+        with open(source, 'rb') as src, open(dest, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        return True
+    except OSError:
+        # EOPNOTSUPP/EXDEV/EINVAL: no reflink support between these paths
+        try:
+            os.remove(dest)
+        except OSError:
+            pass
+        return False
+
+
+def transfer_file(
+    source: str,
+    dest: str,
+    copy_mode: str = "copy",
+    preserve_metadata: bool = True
+) -> None:
+    """
+    Bring a single file into place using the requested copy mode.
+    
+    Args:
+        source: Source file path
+        dest: Destination file path
+        copy_mode: One of COPY_MODES
+        preserve_metadata: Whether to preserve file metadata on copies
+    """
+    if copy_mode == "hardlink":
+        try:
+            os.link(source, dest)
+            return
+        except OSError as e:
+            # Different device, existing dest or no link support
+            logger.debug("Hardlink failed for %s, copying instead: %s", source, e)
+    elif copy_mode == "reflink":
+        if reflink_file(source, dest):
+            if preserve_metadata and sys.platform != "darwin":
+                shutil.copystat(source, dest)
+            return
+        logger.debug("Reflink not supported for %s, copying instead", source)
+    
+    if preserve_metadata:
+        shutil.copy2(source, dest)
+    else:
+        shutil.copy(source, dest)
+
 
 def ensure_directory(path: Path) -> None:
     """
@@ -21,7 +125,7 @@ def ensure_directory(path: Path) -> None:
     """
     try:
         path.mkdir(parents=True, exist_ok=True)
-        logger.debug(f"Ensured directory exists: {path}")
+        logger.debug("Ensured directory exists: %s", path)
     except Exception as e:
         logger.error(f"Failed to create directory {path}: {e}")
         raise
@@ -31,16 +135,24 @@ def copy_media_files(
     source_dir: Path,
     dest_dir: Path,
     exclude_pattern: str = "thumbnail~",
-    preserve_metadata: bool = True
+    preserve_metadata: bool = True,
+    copy_mode: str = "copy",
+    max_workers: int = 4
 ) -> Dict[str, Any]:
     """
     Copy media files from source to destination, excluding thumbnails.
     
+    Files are copied from a thread pool; the copies are kernel-bound and
+    release the GIL, so independent files overlap.
+    
     Args:
         source_dir: Source directory containing media files
         dest_dir: Destination directory
         exclude_pattern: Pattern to exclude (default: "thumbnail~")
         preserve_metadata: Whether to preserve file metadata
+        copy_mode: One of COPY_MODES; "reflink" and "hardlink" avoid copying
+                   file contents when the filesystem allows it
+        max_workers: Number of files copied concurrently
         
     Returns:
         Dictionary with statistics about the copy operation
@@ -55,36 +167,45 @@ def copy_media_files(
         "total_size": 0
     }
     
+    def copy_one(entry: os.DirEntry) -> Tuple[bool, int]:
+        try:
+            transfer_file(
+                entry.path, os.path.join(dest_dir, entry.name), copy_mode, preserve_metadata
+            )
+            return True, entry.stat().st_size
+        except Exception as e:
+            logger.error(f"Failed to copy {entry.name}: {e}")
+            return False, 0
+    
     try:
-        for file_path in source_dir.iterdir():
-            if not file_path.is_file():
-                continue
+        to_copy = []
+        with os.scandir(source_dir) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                
+                stats["total_files"] += 1
+                
+                # Check if file should be excluded
+                if exclude_pattern and exclude_pattern in entry.name:
+                    stats["excluded"] += 1
+                    logger.debug("Excluded: %s", entry.name)
+                    continue
+                
+                to_copy.append(entry)
+        
+        # Copy files; results are tallied here, so workers share no state
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for success, size in executor.map(copy_one, to_copy):
+                if not success:
+                    stats["failed"] += 1
+                    continue
                 
-            stats["total_files"] += 1
-            
-            # Check if file should be excluded
-            if exclude_pattern and exclude_pattern in file_path.name:
-                stats["excluded"] += 1
-                logger.debug(f"Excluded: {file_path.name}")
-                continue
-            
-            # Copy file
-            dest_path = dest_dir / file_path.name
-            try:
-                if preserve_metadata:
-                    shutil.copy2(file_path, dest_path)
-                else:
-                    shutil.copy(file_path, dest_path)
-                    
                 stats["copied"] += 1
-                stats["total_size"] += file_path.stat().st_size
+                stats["total_size"] += size
                 
                 if stats["copied"] % 100 == 0:
                     logger.info(f"Copied {stats['copied']} files...")
-                    
-            except Exception as e:
-                stats["failed"] += 1
-                logger.error(f"Failed to copy {file_path.name}: {e}")
     
     except Exception as e:
         logger.error(f"Error during file copy operation: {e}")
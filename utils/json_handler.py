@@ -5,11 +5,30 @@ Adapted from snapchat_merger/utils.py
 
 import json
 import logging
+import os
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, BinaryIO, Iterator, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    # orjson is optional; the json module is used when it is missing
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    # ijson is optional; without it large files are loaded in full
+    ijson = None
 
 logger = logging.getLogger(__name__)
 
+# orjson equivalent of json.dump(..., indent=2); non-str keys are
+# stringified like the json module does
+_ORJSON_DUMP_OPTIONS = (
+    orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+)
+
 
 def load_json(path: Path) -> Dict[str, Any]:
     """
@@ -30,10 +49,15 @@ def load_json(path: Path) -> Dict[str, Any]:
         raise FileNotFoundError(f"JSON file not found: {path}")
     
     try:
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            logger.debug(f"Successfully loaded JSON from {path}")
-            return data
+        if orjson is not None:
+            # orjson decodes UTF-8 bytes directly; its JSONDecodeError
+            # subclasses json.JSONDecodeError
+            data = orjson.loads(path.read_bytes())
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        logger.debug("Successfully loaded JSON from %s", path)
+        return data
     except json.JSONDecodeError as e:
         logger.error(f"Invalid JSON in {path}: {e}")
         raise
@@ -42,6 +66,77 @@ def load_json(path: Path) -> Dict[str, Any]:
         raise
 
 
+# Files at least this large are streamed by iter_json_items when ijson is
+# installed; below it a full orjson/json load is faster
+STREAM_MIN_BYTES = 256 * 1024 * 1024
+
+
+def iter_json_items(path: Path, stream: Optional[bool] = None) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield the top-level (key, value) pairs of a JSON object file.
+    
+    Streaming parses one value at a time, so the whole document is never
+    held as text alongside its parsed form.
+    
+    Args:
+        path: Path to JSON file containing an object
+        stream: Force (True) or disable (False) streaming with ijson; by
+                default files of STREAM_MIN_BYTES or more are streamed
+        
+    Yields:
+        (key, value) pairs in file order
+        
+    Raises:
+        ValueError: If the document is not a JSON object
+    """
+    if stream is None:
+        stream = path.exists() and path.stat().st_size >= STREAM_MIN_BYTES
+    
+    if not stream or ijson is None:
+        data = load_json(path)
+        if not isinstance(data, dict):
+            raise ValueError(f"{path} does not contain a JSON object")
+        yield from data.items()
+        return
+    
+    logger.debug("Streaming JSON from %s", path)
+    with open(path, 'rb') as f:
+        # ijson would yield nothing for a top-level array or scalar, so the
+        # first non-whitespace byte is checked before streaming
+        if _first_byte(f) != b'{':
+            raise ValueError(f"{path} does not contain a JSON object")
+        f.seek(0)
+        # use_float keeps numbers as float/int instead of Decimal, matching load_json
+        yield from ijson.kvitems(f, '', use_float=True)
+
+
+def _first_byte(f: BinaryIO) -> bytes:
+    """First non-whitespace byte of a binary file (b'' if there is none)."""
+    while True:
+        chunk = f.read(4096)
+        if not chunk:
+            return b''
+        chunk = chunk.lstrip()
+        if chunk:
+            return chunk[:1]
+
+
+# O_BINARY keeps Windows from translating newlines
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+
+
+def _write_bytes(path: Path, buf: bytes) -> None:
+    """Write buf to path with unbuffered os.write calls (no fsync)."""
+    fd = os.open(path, _WRITE_FLAGS, 0o644)
+    try:
+        view = memoryview(buf)
+        # os.write may write less than asked for, e.g. on very large buffers
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
 def save_json(
     data: Dict[str, Any],
     path: Path,
@@ -56,19 +151,116 @@ def save_json(
         path: Output file path
         indent: JSON indentation (default: 2)
         ensure_ascii: Whether to escape non-ASCII characters (default: False)
+    
+    orjson is used when installed and the default formatting is requested
+    (it only supports 2-space indentation and always writes raw UTF-8).
     """
     try:
         # Create parent directory if it doesn't exist
         path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=indent, ensure_ascii=ensure_ascii)
-            logger.debug(f"Successfully saved JSON to {path}")
+        if orjson is not None and indent == 2 and not ensure_ascii:
+            # orjson produces the whole document as UTF-8 bytes; hand it to
+            # the kernel directly instead of going through a buffered file
+            _write_bytes(path, orjson.dumps(data, option=_ORJSON_DUMP_OPTIONS))
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=indent, ensure_ascii=ensure_ascii)
+        logger.debug("Successfully saved JSON to %s", path)
     except Exception as e:
         logger.error(f"Failed to save JSON to {path}: {e}")
         raise
 
 
+# Conversation folder layouts:
+#   "json"  - conversation.json holding {"conversation_metadata", "messages"}
+#   "jsonl" - metadata.json with the metadata object, plus messages.jsonl
+#             holding one message per line
+CONVERSATION_JSON = "conversation.json"
+MESSAGES_JSONL = "messages.jsonl"
+METADATA_JSON = "metadata.json"
+CONVERSATION_FILES = {
+    "json": CONVERSATION_JSON,
+    "jsonl": MESSAGES_JSONL
+}
+
+
+def _dumps_line(obj: Any) -> bytes:
+    """Serialize obj as a single JSONL line."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8') + b"\n"
+
+
+def find_conversation_file(conv_dir: Path) -> Optional[Path]:
+    """
+    Find the conversation file of a conversation folder in either layout.
+    
+    Args:
+        conv_dir: Conversation folder
+        
+    Returns:
+        Path to conversation.json or messages.jsonl, or None if neither exists
+    """
+    for name in (CONVERSATION_JSON, MESSAGES_JSONL):
+        path = conv_dir / name
+        if path.exists():
+            return path
+    return None
+
+
+def load_conversation(path: Path) -> Dict[str, Any]:
+    """
+    Load a conversation written by save_conversation.
+    
+    Args:
+        path: conversation.json, or messages.jsonl with metadata.json beside it
+        
+    Returns:
+        Dictionary with 'conversation_metadata' and 'messages'
+    """
+    if path.suffix != ".jsonl":
+        return load_json(path)
+    
+    metadata = load_json(path.with_name(METADATA_JSON))
+    loads = orjson.loads if orjson is not None else json.loads
+    
+    # Parse line by line instead of decoding one huge document
+    messages = []
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                messages.append(loads(line))
+    
+    return {
+        'conversation_metadata': metadata,
+        'messages': messages
+    }
+
+
+def save_conversation(path: Path, data: Dict[str, Any]) -> None:
+    """
+    Save a conversation in the layout implied by the file name.
+    
+    Args:
+        path: conversation.json for the single-file layout, or
+              messages.jsonl for the metadata.json + JSONL layout
+        data: Dictionary with 'conversation_metadata' and 'messages'
+    """
+    if path.suffix != ".jsonl":
+        save_json(data, path)
+        return
+    
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        save_json(data.get('conversation_metadata', {}), path.with_name(METADATA_JSON))
+        _write_bytes(path, b"".join(map(_dumps_line, data.get('messages', []))))
+        logger.debug("Successfully saved JSONL to %s", path)
+    except Exception as e:
+        logger.error(f"Failed to save JSONL to {path}: {e}")
+        raise
+
+
 def validate_chat_history(data: Dict[str, Any]) -> bool:
     """
     Validate chat history JSON structure.